@@ -5,6 +5,8 @@ from .models import CourseShiftSettings
 from .serializers import CourseShiftSettingsSerializer, CourseShiftSerializer
 from .manager import CourseShiftManager
 
+default_app_config = 'course_shifts.apps.CourseShiftsConfig'
+
 
 def _section_course_shifts(course, access):
     course_key = course.id
@@ -13,11 +15,12 @@ def _section_course_shifts(course, access):
     url_list = reverse('course_shifts:list', kwargs={"course_id": course_id})
     url_detail = reverse('course_shifts:detail', kwargs={"course_id": course_id})
     url_membership = reverse('course_shifts:membership', kwargs={"course_id": course_id})
+    url_summary = reverse('course_shifts:summary', kwargs={"course_id": course_id})
 
     shift_manager = CourseShiftManager(course_key)
     if not shift_manager.is_enabled:
         return {}
-    serial_settings = shift_manager.get_serial_settings()
+    summary = shift_manager.get_summary()
     section_data = {
         'section_key': 'course_shifts',
         'section_display_name': _('Course Shifts'),
@@ -26,7 +29,9 @@ def _section_course_shifts(course, access):
         'course_shifts_list_url': url_list,
         'course_shifts_detail_url': url_detail,
         'course_shifts_membership_url':url_membership,
-        'current_settings': serial_settings.data,
+        'course_shifts_summary_url': url_summary,
+        'current_settings': dict(summary['settings'], course_key=unicode(course_key)),
+        'shifts_summary': summary,
     }
     return section_data
 
@@ -1,14 +1,57 @@
+import csv
+import json
+from collections import OrderedDict
+from itertools import islice
+
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
+from django.utils.decorators import method_decorator
 from opaque_keys.edx.keys import CourseKey
 from openedx.core.lib.api.permissions import IsStaffOrOwner
 from rest_framework import views, permissions, response, status, generics
+from student.models import CourseEnrollment
 
 from .manager import CourseShiftManager
-from .models import CourseShiftSettings, CourseShiftGroup
+from .models import CourseShiftSettings, CourseShiftGroup, CourseShiftGroupMembership
 from .serializers import CourseShiftSettingsSerializer, CourseShiftSerializer
 from openedx.core.lib.api.permissions import ApiKeyHeaderPermission
 
 
+def get_user_ids(usernames):
+    """
+    Returns dict {username: user id} for existing users,
+    users are requested by chunks
+    """
+    chunk_size = CourseShiftGroupMembership.BULK_CHUNK_SIZE
+    user_ids = {}
+    for index in range(0, len(usernames), chunk_size):
+        chunk = usernames[index:index + chunk_size]
+        user_ids.update(User.objects.filter(username__in=chunk).values_list('username', 'id'))
+    return user_ids
+
+
+def get_list_value(value):
+    """
+    Returns list from request value given as list
+    or comma-separated string, values of other types are ignored
+    """
+    if isinstance(value, basestring):
+        return [x.strip() for x in value.split(",") if x.strip()]
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return []
+
+
+class EchoBuffer(object):
+    """
+    File-like object that returns written value,
+    used to stream csv.writer output
+    """
+    def write(self, value):
+        return value
+
+
 class CourseShiftsPermission(permissions.BasePermission):
     """
     Allows staff or api-key users to change shifts.
@@ -43,7 +86,7 @@ class CourseShiftSettingsView(views.APIView):
         serial_shift_settings = CourseShiftSettingsSerializer(data=data, partial=True)
         if serial_shift_settings.is_valid():
             course_key = serial_shift_settings.validated_data['course_key']
-            instance = CourseShiftSettings.get_course_settings(course_key)
+            instance = CourseShiftSettings.get_or_create_course_settings(course_key)
             serial_shift_settings.update(instance, serial_shift_settings.validated_data)
             return response.Response({})
         else:
@@ -113,7 +156,7 @@ class CourseShiftDetailView(views.APIView):
         enroll_start, enroll_finish = shift.get_enrollment_limits()
         data["enroll_start"] = str(enroll_start)
         data["enroll_finish"] = str(enroll_finish)
-        data["users_count"] = shift.users.count()
+        data["users_count"] = shift.member_count
         return response.Response(data=data)
 
     def delete(self, request, course_id):
@@ -233,3 +276,272 @@ class CourseShiftUserView(views.APIView):
         else:
             data = CourseShiftSerializer(current_shift).data
             return response.Response(data)
+
+
+class CourseShiftBulkUserView(views.APIView):
+    """
+    Allows instructor to add many users to the shift at once.
+    Usernames are given as list or comma-separated string.
+    View isn't wrapped in the request transaction, so every chunk of
+    users is committed separately
+    """
+    permission_classes = CourseShiftsPermission,
+
+    @method_decorator(transaction.non_atomic_requests)
+    def dispatch(self, *args, **kwargs):
+        return super(CourseShiftBulkUserView, self).dispatch(*args, **kwargs)
+
+    def post(self, request, course_id):
+        course_key = CourseKey.from_string(course_id)
+        shift_manager = CourseShiftManager(course_key)
+        if not shift_manager.is_enabled:
+            message = "Shifts are not enabled for course {}".format(course_id)
+            return response.Response(status=status.HTTP_406_NOT_ACCEPTABLE, data={"error": message})
+
+        usernames = get_list_value(request.data.get("usernames"))
+        if not usernames:
+            return response.Response(status=status.HTTP_400_BAD_REQUEST, data={"error": "No usernames given"})
+
+        shift_name = request.data.get("shift_name")
+        shift = shift_manager.get_shift(shift_name)
+        if not shift:
+            message = "Shift with name {} not found for {}".format(shift_name, course_id)
+            return response.Response(status=status.HTTP_400_BAD_REQUEST, data={"error": message})
+
+        user_ids = get_user_ids(usernames)
+        try:
+            result = shift_manager.bulk_enroll(user_ids.values(), shift, forced=True)
+        except ValueError as e:
+            return response.Response(status=status.HTTP_400_BAD_REQUEST, data={"error": e.message})
+        except IntegrityError:
+            message = "Memberships were changed concurrently, some users may be not enrolled. Try again"
+            return response.Response(status=status.HTTP_409_CONFLICT, data={"error": message})
+        result["not_found"] = [x for x in usernames if x not in user_ids]
+        return response.Response(result)
+
+
+class CourseShiftUserUploadView(views.APIView):
+    """
+    Allows instructor to assign users to shifts by CSV file
+    with 'username,shift_name' rows. File is read as a stream and
+    applied by chunks, every chunk is committed separately outside
+    of the request transaction. Returns result for every row.
+    """
+    permission_classes = CourseShiftsPermission,
+    HEADER = ["username", "shift_name"]
+
+    @method_decorator(transaction.non_atomic_requests)
+    def dispatch(self, *args, **kwargs):
+        return super(CourseShiftUserUploadView, self).dispatch(*args, **kwargs)
+
+    def post(self, request, course_id):
+        course_key = CourseKey.from_string(course_id)
+        shift_manager = CourseShiftManager(course_key)
+        if not shift_manager.is_enabled:
+            message = "Shifts are not enabled for course {}".format(course_id)
+            return response.Response(status=status.HTTP_406_NOT_ACCEPTABLE, data={"error": message})
+
+        csv_file = request.FILES.get("file")
+        if not csv_file:
+            return response.Response(status=status.HTTP_400_BAD_REQUEST, data={"error": "No file given"})
+
+        shifts = dict((x.name, x) for x in shift_manager.get_all_shifts())
+        rows = enumerate(csv.reader(csv_file), 1)
+        chunk_size = CourseShiftGroupMembership.BULK_CHUNK_SIZE
+        results = []
+        applied_results = {}
+        chunk = list(islice(rows, chunk_size))
+        while chunk:
+            results.extend(self._process_chunk(shift_manager, shifts, chunk, applied_results))
+            chunk = list(islice(rows, chunk_size))
+
+        statuses = [x["status"] for x in results]
+        return response.Response({
+            "success_count": statuses.count("success"),
+            "error_count": statuses.count("error"),
+            "overridden_count": statuses.count("overridden"),
+            "rows": results,
+        })
+
+    def _parse_row(self, row):
+        """
+        Returns list of decoded row values and error message or None.
+        UTF-8 BOM (e.g. in Excel export) is dropped
+        """
+        try:
+            return [x.decode('utf-8-sig').strip() for x in row], None
+        except UnicodeDecodeError:
+            return [], "Row is not UTF-8 encoded"
+
+    def _process_chunk(self, shift_manager, shifts, chunk, applied_results):
+        """
+        Validates rows of the chunk and enrolls found users
+        on their shifts. Returns list of the row results.
+        If user has several rows, the last one is applied and earlier ones are
+        reported as overridden by it. applied_results keeps the applied
+        row result of every user between chunks
+        """
+        rows = []
+        for row_number, row in chunk:
+            row, error = self._parse_row(row)
+            if row_number == 1 and [x.lower() for x in row] == self.HEADER:
+                continue
+            rows.append((row_number, row, error))
+        user_ids = get_user_ids([x[0] for _, x, __ in rows if x])
+
+        results = []
+        assignments = OrderedDict()
+        for row_number, row, error in rows:
+            result = {"row": row_number, "username": row[0] if row else "", "status": "error"}
+            results.append(result)
+            if error:
+                result["error"] = error
+                continue
+            if len(row) != 2:
+                result["error"] = "Row must contain username and shift name"
+                continue
+            username, shift_name = row
+            if username not in user_ids:
+                result["error"] = "User with username {} not found".format(username)
+                continue
+            if shift_name not in shifts:
+                result["error"] = "Shift with name {} not found".format(shift_name)
+                continue
+            result["status"] = "success"
+            assignments.setdefault(user_ids[username], []).append((shifts[shift_name], result))
+
+        users_by_shift = OrderedDict()
+        for user_id, user_assignments in assignments.iteritems():
+            # The last row of the user is applied
+            shift = user_assignments[-1][0]
+            users_by_shift.setdefault(shift, []).append(user_id)
+        for shift, shift_user_ids in users_by_shift.iteritems():
+            try:
+                shift_manager.bulk_enroll(shift_user_ids, shift, forced=True)
+            except (ValueError, IntegrityError) as e:
+                for user_id in shift_user_ids:
+                    for __, result in assignments[user_id]:
+                        result["status"] = "error"
+                        result["error"] = u"Failed to enroll on shift {}: {}".format(shift.name, e)
+                continue
+            for user_id in shift_user_ids:
+                user_results = [x[1] for x in assignments[user_id]]
+                if user_id in applied_results:
+                    user_results.insert(0, applied_results[user_id])
+                for result in user_results[:-1]:
+                    result["status"] = "overridden"
+                    result["overridden_by"] = user_results[-1]["row"]
+                applied_results[user_id] = user_results[-1]
+        return results
+
+
+class CourseShiftRosterExportView(views.APIView):
+    """
+    Streams all shift members of the course as CSV (default)
+    or JSON lines, format is set by 'export_format' query parameter
+    """
+    permission_classes = CourseShiftsPermission,
+    FIELDS = ("username", "email", "shift_name", "start_date", "days_shift")
+
+    def get(self, request, course_id):
+        course_key = CourseKey.from_string(course_id)
+        shift_manager = CourseShiftManager(course_key)
+        if not shift_manager.is_enabled:
+            message = "Shifts are not enabled for course {}".format(course_id)
+            return response.Response(status=status.HTTP_406_NOT_ACCEPTABLE, data={"error": message})
+
+        export_format = request.query_params.get("export_format", "csv")
+        if export_format == "csv":
+            rows, content_type = self._iter_csv(shift_manager), "text/csv"
+        elif export_format == "jsonl":
+            rows, content_type = self._iter_jsonl(shift_manager), "application/x-ndjson"
+        else:
+            message = "Unknown format {}, must be 'csv' or 'jsonl'".format(export_format)
+            return response.Response(status=status.HTTP_400_BAD_REQUEST, data={"error": message})
+
+        streaming_response = StreamingHttpResponse(rows, content_type=content_type)
+        streaming_response["Content-Disposition"] = 'attachment; filename="shifts_roster_{}.{}"'.format(
+            course_key.to_deprecated_string().replace("/", "_"),
+            export_format
+        )
+        return streaming_response
+
+    def _iter_csv(self, shift_manager):
+        writer = csv.writer(EchoBuffer())
+        yield writer.writerow(self.FIELDS)
+        for row in shift_manager.iter_roster():
+            yield writer.writerow([unicode(x).encode('utf-8') for x in row])
+
+    def _iter_jsonl(self, shift_manager):
+        for row in shift_manager.iter_roster():
+            data = dict(zip(self.FIELDS, row))
+            data["start_date"] = str(data["start_date"])
+            yield json.dumps(data) + "\n"
+
+
+class CourseShiftSummaryView(views.APIView):
+    """
+    Returns settings, all shifts with enrollment limits and member counts
+    and next autostart date for the instructor dashboard in one request
+    """
+    permission_classes = CourseShiftsPermission,
+
+    def get(self, request, course_id):
+        course_key = CourseKey.from_string(course_id)
+        shift_manager = CourseShiftManager(course_key)
+        if not shift_manager.is_enabled:
+            message = "Shifts are not enabled for course {}".format(course_id)
+            return response.Response(status=status.HTTP_406_NOT_ACCEPTABLE, data={"error": message})
+        return response.Response(shift_manager.get_summary())
+
+
+class CourseShiftUsersBatchView(views.APIView):
+    """
+    Returns shift names for many users at once. Users are given
+    by 'usernames' or 'user_ids' as list or comma-separated string,
+    users without shift are mapped to None
+    """
+    permission_classes = CourseShiftsPermission,
+
+    def post(self, request, course_id):
+        course_key = CourseKey.from_string(course_id)
+        shift_manager = CourseShiftManager(course_key)
+        if not shift_manager.is_enabled:
+            message = "Shifts are not enabled for course {}".format(course_id)
+            return response.Response(status=status.HTTP_406_NOT_ACCEPTABLE, data={"error": message})
+
+        usernames = get_list_value(request.data.get("usernames"))
+        user_ids = get_list_value(request.data.get("user_ids"))
+        if usernames:
+            ids_by_key = get_user_ids(usernames)
+        elif user_ids:
+            try:
+                ids_by_key = dict((x, int(x)) for x in user_ids)
+            except (TypeError, ValueError):
+                return response.Response(status=status.HTTP_400_BAD_REQUEST, data={"error": "Invalid user_ids"})
+        else:
+            message = "Either usernames or user_ids must be given"
+            return response.Response(status=status.HTTP_400_BAD_REQUEST, data={"error": message})
+
+        users_shifts = shift_manager.get_users_shifts(ids_by_key.values())
+        data = {}
+        for key, user_id in ids_by_key.iteritems():
+            shift = users_shifts.get(user_id)
+            data[key] = shift and shift.name
+        return response.Response({"shifts": data})
+
+
+class CourseShiftUserDeadlinesView(views.APIView):
+    """
+    Returns all shifted due and start dates of the course
+    for the requesting learner
+    """
+    permission_classes = permissions.IsAuthenticated,
+
+    def get(self, request, course_id):
+        course_key = CourseKey.from_string(course_id)
+        if not CourseEnrollment.is_enrolled(request.user, course_key):
+            message = "User is not enrolled in course {}".format(course_id)
+            return response.Response(status=status.HTTP_403_FORBIDDEN, data={"error": message})
+        shift_manager = CourseShiftManager(course_key)
+        return response.Response({"deadlines": shift_manager.get_user_deadlines(request.user)})
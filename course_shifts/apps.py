@@ -0,0 +1,15 @@
+"""
+Course shifts app config
+"""
+from django.apps import AppConfig
+
+
+class CourseShiftsConfig(AppConfig):
+    """
+    Connects signal handlers at startup
+    """
+    name = 'course_shifts'
+    verbose_name = "Course Shifts"
+
+    def ready(self):
+        from . import signals  # pylint: disable=unused-variable
@@ -0,0 +1,81 @@
+"""
+This file contains the creation of autostart shifts. Shifts are created
+by the periodic sweep (watch 'create_autostart_shifts' management command),
+not at the request time.
+"""
+from logging import getLogger
+from multiprocessing.pool import ThreadPool
+
+from django.core.cache import cache
+from django.db import connection
+
+from .models import CourseShiftSettings
+
+log = getLogger(__name__)
+
+AUTOSTART_LOCK_KEY = u"course_shifts.autostart_lock.{}"
+AUTOSTART_LOCK_TIMEOUT = 60 * 10
+
+
+def update_course_shifts_autostart(course_key):
+    """
+    Creates due autostart shifts for the course. Course is locked
+    while shifts are created, so concurrent sweeps skip it.
+    Returns False if course is locked by another sweep
+    """
+    lock_key = AUTOSTART_LOCK_KEY.format(unicode(course_key))
+    if not cache.add(lock_key, True, AUTOSTART_LOCK_TIMEOUT):
+        log.info("Autostart shifts for {} are being created by another process".format(str(course_key)))
+        return False
+    try:
+        shift_settings = CourseShiftSettings.objects.get(course_key=course_key)
+        shift_settings.update_shifts_autostart()
+    finally:
+        cache.delete(lock_key)
+    return True
+
+
+def _safe_update(course_key):
+    """
+    Creates autostart shifts for the course, errors are logged,
+    so broken course doesn't stop the sweep
+    """
+    try:
+        return update_course_shifts_autostart(course_key)
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Failed to create autostart shifts for {}".format(str(course_key)))
+        return False
+
+
+def _update_in_thread(course_key):
+    try:
+        return _safe_update(course_key)
+    finally:
+        connection.close()
+
+
+def sweep_autostart_shifts(workers=1):
+    """
+    Creates due autostart shifts for all courses with enabled
+    shifts in autostart mode. Courses are processed by 'workers' threads.
+    Returns number of processed courses
+    """
+    course_keys = list(CourseShiftSettings.objects.filter(
+        is_shift_enabled=True,
+        is_autostart=True
+    ).values_list('course_key', flat=True))
+    if workers > 1:
+        pool = ThreadPool(workers)
+        try:
+            results = pool.map(_update_in_thread, course_keys)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_safe_update(x) for x in course_keys]
+    processed_count = len([x for x in results if x])
+    log.info("Autostart shifts sweep is finished: {} of {} courses processed".format(
+        processed_count,
+        len(course_keys)
+    ))
+    return processed_count
@@ -0,0 +1,66 @@
+"""
+Helpers for course shifts data kept in the django cache.
+
+Every course has a cache version which is a part of all its cache keys,
+so all cached data of the course is invalidated at once by version increment.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+COURSE_VERSION_KEY = u"course_shifts.version.{}"
+
+
+def _new_version():
+    # Version is based on time, so it isn't repeated if version key is evicted
+    return int(time.time() * 1000)
+
+
+def get_course_cache_version(course_key):
+    version_key = COURSE_VERSION_KEY.format(unicode(course_key))
+    version = cache.get(version_key)
+    if version is None:
+        version = _new_version()
+        if not cache.add(version_key, version, None):
+            version = cache.get(version_key, version)
+    return version
+
+
+def run_on_commit(func):
+    """
+    Calls func after the current transaction is committed, or at once
+    outside of transaction. Django versions without transaction.on_commit
+    call it at once
+    """
+    on_commit = getattr(transaction, 'on_commit', None)
+    if on_commit:
+        on_commit(func)
+    else:
+        func()
+
+
+def bump_course_cache_version(course_key):
+    """
+    Invalidates all cached data of the course after the current transaction
+    is committed, so data read by other processes before the commit isn't kept
+    """
+    version_key = COURSE_VERSION_KEY.format(unicode(course_key))
+
+    def bump():
+        try:
+            cache.incr(version_key)
+        except ValueError:
+            cache.set(version_key, _new_version(), None)
+
+    run_on_commit(bump)
+
+
+def get_course_cache_key(name, course_key, *parts):
+    """
+    Returns cache key for the course data with given name,
+    key contains current course cache version
+    """
+    key_parts = [name, unicode(course_key), unicode(get_course_cache_version(course_key))]
+    key_parts.extend(unicode(x) for x in parts)
+    return u"course_shifts.{}".format(u".".join(key_parts))
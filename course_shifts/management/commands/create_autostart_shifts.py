@@ -0,0 +1,27 @@
+"""
+Creates due shifts for all courses in autostart mode. Should be run periodically,
+e.g. daily by cron.
+
+    python manage.py lms create_autostart_shifts [--workers N] --settings=YOUR_SETTINGS
+"""
+from django.core.management.base import BaseCommand
+
+from course_shifts.autostart import sweep_autostart_shifts
+
+
+class Command(BaseCommand):
+    """
+    Sweeps autostart courses and creates their due shifts
+    """
+    help = "Creates due shifts for all courses in autostart mode"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help="Number of threads processing courses in parallel",
+        )
+
+    def handle(self, *args, **options):
+        sweep_autostart_shifts(workers=options['workers'])
@@ -0,0 +1,35 @@
+"""
+Fixes member_count of shifts which differs from the actual number of memberships.
+
+    python manage.py lms reconcile_shift_member_counts [--course-id <course_id>] --settings=YOUR_SETTINGS
+"""
+from logging import getLogger
+
+from django.core.management.base import BaseCommand
+from opaque_keys.edx.keys import CourseKey
+
+from course_shifts.models import CourseShiftGroup
+
+log = getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Reconciles CourseShiftGroup.member_count with memberships
+    """
+    help = "Fixes shifts member_count drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course-id',
+            dest='course_id',
+            default=None,
+            help="Course to reconcile, all courses are reconciled if not given",
+        )
+
+    def handle(self, *args, **options):
+        course_key = None
+        if options['course_id']:
+            course_key = CourseKey.from_string(options['course_id'])
+        fixed_count = CourseShiftGroup.reconcile_member_counts(course_key)
+        log.info("member_count is fixed for {} shifts".format(fixed_count))
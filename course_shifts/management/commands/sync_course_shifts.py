@@ -0,0 +1,53 @@
+"""
+Enables course shifts for courses that have them turned on in the
+advanced settings and stores course start dates in the shifts settings.
+
+    python manage.py lms sync_course_shifts [--course-id <course_id> ...] --settings=YOUR_SETTINGS
+"""
+from logging import getLogger
+
+from django.core.management.base import BaseCommand
+from opaque_keys.edx.keys import CourseKey
+from xmodule.modulestore.django import modulestore
+
+from course_shifts.models import CourseShiftSettings
+
+log = getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Synchronizes CourseShiftSettings.is_shift_enabled and course_start with the course
+    """
+    help = (
+        "Enables course shifts for courses with 'enable_course_shifts' advanced setting "
+        "and stores course start dates"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course-id',
+            action='append',
+            dest='course_ids',
+            default=[],
+            help="Course to synchronize, all courses are synchronized if not given",
+        )
+
+    def handle(self, *args, **options):
+        store = modulestore()
+        if options['course_ids']:
+            courses = (store.get_course(CourseKey.from_string(x)) for x in options['course_ids'])
+        else:
+            courses = store.get_courses()
+
+        enabled_count = 0
+        start_synced_count = 0
+        for course in courses:
+            if not course:
+                continue
+            if CourseShiftSettings.sync_is_shift_enabled(course):
+                enabled_count += 1
+            if CourseShiftSettings.sync_course_start_date(course):
+                start_synced_count += 1
+        log.info("Course shifts are enabled for {} courses".format(enabled_count))
+        log.info("Course start dates are stored for {} courses".format(start_synced_count))
@@ -1,8 +1,12 @@
-from datetime import timedelta
+from collections import defaultdict
+from datetime import datetime, timedelta
 
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
+from .cache_utils import get_course_cache_key
 from .models import CourseShiftGroup, CourseShiftGroupMembership, CourseShiftSettings
+from .schedule import get_course_schedule, get_deadlines_table, get_shifted_schedule
 from .serializers import CourseShiftSettingsSerializer
 
 date_now = lambda: timezone.now().date()
@@ -14,23 +18,51 @@ class CourseShiftManager(object):
     shifts for given course: user transfer between shifts, shift creation,
     data about available shifts. Supposed to be used outside the app in edx
     """
-    SHIFT_COURSE_FIELD_NAME = "enable_course_shifts"
+    SHIFT_COURSE_FIELD_NAME = CourseShiftSettings.COURSE_ENABLE_FIELD_NAME
+    SUMMARY_CACHE_TIMEOUT = 60
+    DEADLINES_CACHE_TIMEOUT = 60 * 60 * 24
 
     def __init__(self, course_key):
         self.course_key = course_key
         self.settings = CourseShiftSettings.get_course_settings(self.course_key)
 
+    @classmethod
+    def get_user_courses_shifts(cls, user, course_keys):
+        """
+        Returns shifts data of the user for many courses at once, e.g. for the
+        student dashboard: dict {course_key: {"settings", "is_enabled", "shift"}}.
+        Settings aren't created for courses without them. Data is got
+        by two queries whatever the number of courses
+        """
+        course_keys = list(course_keys)
+        courses_settings = dict(
+            (x.course_key, x) for x in CourseShiftSettings.objects.filter(course_key__in=course_keys)
+        )
+        memberships = CourseShiftGroupMembership.objects.filter(
+            user=user,
+            course_key__in=course_keys
+        ).select_related('course_shift_group__course_user_group')
+        courses_shifts = dict((x.course_key, x.course_shift_group) for x in memberships)
+
+        courses_data = {}
+        for course_key in course_keys:
+            shift_settings = courses_settings.get(course_key) or CourseShiftSettings(course_key=course_key)
+            is_enabled = shift_settings.is_shift_enabled
+            courses_data[course_key] = {
+                "settings": shift_settings,
+                "is_enabled": is_enabled,
+                "shift": courses_shifts.get(course_key) if is_enabled else None,
+            }
+        return courses_data
+
     @property
     def is_enabled(self):
-        course = self.settings.course
-        if self.settings.is_shift_enabled:
-            return True
-        field = self.SHIFT_COURSE_FIELD_NAME
-        if hasattr(course, field) and getattr(course, field):
-            self.settings.is_shift_enabled = True
-            self.settings.save()
-            return True
-        return False
+        """
+        Checks whether shifts are enabled for the course. Only settings are read,
+        flag from the course advanced settings is synchronized with them
+        at course publish (watch CourseShiftSettings.sync_is_shift_enabled)
+        """
+        return self.settings.is_shift_enabled
 
     def get_user_shift(self, user):
         """
@@ -43,6 +75,111 @@ class CourseShiftManager(object):
         if membership:
             return membership.course_shift_group
 
+    def get_user_days_shift(self, user):
+        """
+        Returns days_shift of user's shift for manager's course or None.
+        Shift is read from the django cache, without database queries
+        for cached users
+        """
+        if not self.is_enabled:
+            return
+        shift_data = CourseShiftGroupMembership.get_user_shift_data(user.id, self.course_key)
+        if shift_data:
+            return shift_data[1]
+
+    def get_users_shifts(self, users):
+        """
+        Returns dict {user id: shift} for given users (User objects or ids)
+        that have membership in the course. Memberships are requested
+        by chunks with single query for each chunk
+        """
+        if not self.is_enabled:
+            return {}
+        user_ids = [getattr(x, 'pk', x) for x in users]
+        shifts = dict((x.id, x) for x in self.get_all_shifts())
+        chunk_size = CourseShiftGroupMembership.BULK_CHUNK_SIZE
+        users_shifts = {}
+        for index in range(0, len(user_ids), chunk_size):
+            memberships = CourseShiftGroupMembership.objects.filter(
+                course_key=self.course_key,
+                user_id__in=user_ids[index:index + chunk_size]
+            ).values_list('user_id', 'course_shift_group_id')
+            for user_id, shift_id in memberships:
+                users_shifts[user_id] = shifts.get(shift_id)
+        return users_shifts
+
+    def get_user_deadlines(self, user):
+        """
+        Returns user's shifted due and start dates as list of dicts
+        {"location", "field", "date"} ordered by date. Blocks without dates
+        are skipped. Deadlines are cached per course version and days_shift,
+        so they are shared by all members of the shift
+        """
+        days_shift = self.get_user_days_shift(user) or 0
+        cache_key = get_course_cache_key("deadlines", self.course_key, days_shift)
+        deadlines = cache.get(cache_key)
+        if deadlines is None:
+            schedule = get_shifted_schedule(get_course_schedule(self.course_key), days_shift)
+            deadlines = sorted(
+                (
+                    {"location": location, "field": name, "date": value}
+                    for (location, name), value in schedule.iteritems() if value
+                ),
+                key=lambda x: (x["date"], x["location"], x["field"])
+            )
+            cache.set(cache_key, deadlines, self.DEADLINES_CACHE_TIMEOUT)
+        return deadlines
+
+    def iter_roster(self, chunk_size=None):
+        """
+        Yields (username, email, shift name, shift start date, days_shift)
+        for all shift members of the course. Memberships are read by chunks
+        ordered by id, so memory usage doesn't depend on the roster size
+        """
+        shifts = dict((x.id, x) for x in self.get_all_shifts())
+        chunk_size = chunk_size or CourseShiftGroupMembership.BULK_CHUNK_SIZE
+        memberships = CourseShiftGroupMembership.objects.filter(
+            course_key=self.course_key,
+            course_shift_group_id__in=shifts.keys()
+        ).order_by('id')
+        last_id = 0
+        while True:
+            chunk = list(memberships.filter(id__gt=last_id).values_list(
+                'id', 'user__username', 'user__email', 'course_shift_group_id'
+            )[:chunk_size])
+            if not chunk:
+                return
+            for membership_id, username, email, shift_id in chunk:
+                shift = shifts[shift_id]
+                yield username, email, shift.name, shift.start_date, shift.days_shift
+            last_id = chunk[-1][0]
+
+    def iter_deadline_reminders(self, date_from, date_to, chunk_size=None):
+        """
+        Yields (deadlines, user ids) for shift members having due dates between
+        date_from and date_to (inclusive), deadlines are list of (date, block locations)
+        ordered by date. Members of the shifts with the same days_shift have the same
+        deadlines, they are read once by chunks of 'chunk_size' user ids, so memory
+        usage doesn't depend on the course size
+        """
+        shift_ids = defaultdict(list)
+        for shift in self.get_all_shifts():
+            shift_ids[shift.days_shift].append(shift.id)
+        table = get_deadlines_table(get_course_schedule(self.course_key), shift_ids.keys(), date_from, date_to)
+        chunk_size = chunk_size or CourseShiftGroupMembership.BULK_CHUNK_SIZE
+        for days_shift, deadlines in sorted(table.iteritems()):
+            memberships = CourseShiftGroupMembership.objects.filter(
+                course_key=self.course_key,
+                course_shift_group_id__in=shift_ids[days_shift]
+            ).order_by('id')
+            last_id = 0
+            while True:
+                chunk = list(memberships.filter(id__gt=last_id).values_list('id', 'user_id')[:chunk_size])
+                if not chunk:
+                    break
+                yield deadlines, [user_id for membership_id, user_id in chunk]
+                last_id = chunk[-1][0]
+
     def get_all_shifts(self):
         return CourseShiftGroup.get_course_shifts(self.course_key)
 
@@ -57,34 +194,51 @@ class CourseShiftManager(object):
         Returns shifts that are are active at this moment according to the settings,
         i.e. enrollment have started but haven't finished yet.
         If user is given and he has membership all later started shifts are considered
-        as active
+        as active. Shifts are filtered by the database, list of shifts for
+        users without membership is cached.
+        List is returned in all cases, empty list if shifts are disabled
         """
         if not self.settings.is_shift_enabled:
             return []
-        all_shifts = CourseShiftGroup.get_course_shifts(self.course_key)
-        if not all_shifts:
-            return []
-
-        now = date_now()
-        active_shifts = []
         current_start_date = None
         if user:
             current_shift = self.get_user_shift(user)
             current_start_date = current_shift and current_shift.start_date
+        if not current_start_date:
+            return self._get_course_active_shifts()
+        return list(CourseShiftGroup.get_enrollable_shifts(
+            self.course_key,
+            self.settings,
+            later_than=current_start_date
+        ))
 
-        for shift in all_shifts:
-            enroll_start = shift.start_date - timedelta(days=self.settings.enroll_before_days)
-            enroll_finish = shift.start_date + timedelta(days=self.settings.enroll_after_days)
-            if current_start_date and current_start_date < shift.start_date:
-                # If user is in group 'current_shift,' which is older than given 'shift',
-                # then all groups later than 'current' are available for user.
-                # This means that enroll_finish for this shift should be ignored.
-                # Because later enroll_finish is compared with 'now', it is replaced
-                # by 'now' to pass the check successfully anyway
-                enroll_finish = now
-            if enroll_start < now <= enroll_finish:
-                active_shifts.append(shift)
+    def _get_course_active_shifts(self):
+        """
+        Returns list of shifts active for users without membership.
+        List changes only at enrollment window boundaries, so it is cached
+        till the next one. Any shift or settings change invalidates it
+        """
+        cache_key = get_course_cache_key("active_shifts", self.course_key)
+        today = date_now()
+        cached = cache.get(cache_key)
+        if cached and today < cached[0]:
+            return cached[1]
 
+        first_start_date, last_start_date = self.settings.get_enrollable_start_dates(today)
+        shifts = list(CourseShiftGroup.get_course_shifts(self.course_key).filter(start_date__gte=first_start_date))
+        active_shifts = [x for x in shifts if x.start_date <= last_start_date]
+        # Active shifts become inactive after enrollment finish,
+        # future shifts become active at enrollment start
+        boundaries = [
+            x.start_date + timedelta(days=self.settings.enroll_after_days + 1)
+            if x.start_date <= last_start_date else
+            x.start_date - timedelta(days=self.settings.enroll_before_days - 1)
+            for x in shifts
+        ]
+        valid_until = min(boundaries) if boundaries else today + timedelta(days=1)
+        expiration = datetime.combine(valid_until, datetime.min.time()).replace(tzinfo=timezone.utc)
+        timeout = max(int((expiration - timezone.now()).total_seconds()), 1)
+        cache.set(cache_key, (valid_until, active_shifts), timeout)
         return active_shifts
 
     def enroll_user(self, user, shift, forced=False):
@@ -124,6 +278,45 @@ class CourseShiftManager(object):
             ))
         return CourseShiftGroupMembership.transfer_user(user, shift_from, shift)
 
+    def bulk_enroll(self, users, shift, forced=False):
+        """
+        Enrolls many users on given shift by batches. Users can be given
+        as User objects or ids. Current memberships of users are canceled, if
+        shift is None users are just unenrolled.
+        Unless forced is True, shift must be active (watch 'get_active_shifts').
+        Returns dict with numbers of enrolled, transferred, unenrolled and unchanged users
+        """
+        if shift and shift.course_key != self.course_key:
+            raise ValueError("Shift's course_key: '{}', manager course_key:'{}'".format(
+                str(shift.course_key),
+                str(self.course_key)
+            ))
+        if shift and not forced:
+            active_shifts = self.get_active_shifts()
+            if shift not in active_shifts:
+                raise ValueError("Shift {} is not in active shifts: {}".format(
+                    str(shift),
+                    str(active_shifts)
+                ))
+        user_ids = [getattr(x, 'pk', x) for x in users]
+        return CourseShiftGroupMembership.bulk_transfer_users(user_ids, self.course_key, shift)
+
+    def merge_shifts(self, shift_from, shift_to):
+        """
+        Moves all users from 'shift_from' to 'shift_to'. Shift 'shift_from' isn't deleted.
+        Returns number of moved users
+        """
+        for shift in (shift_from, shift_to):
+            if shift.course_key != self.course_key:
+                raise ValueError("Shift's course_key: '{}', manager course_key:'{}'".format(
+                    str(shift.course_key),
+                    str(self.course_key)
+                ))
+        if shift_from == shift_to:
+            return 0
+        memberships = CourseShiftGroupMembership.objects.filter(course_shift_group=shift_from)
+        return CourseShiftGroupMembership.transfer_users(memberships, shift_to)
+
     def create_shift(self, start_date=None, name=None):
         """
         Creates shift with given start date and name.If start_date is not
@@ -147,5 +340,40 @@ class CourseShiftManager(object):
         )
         return shift
 
+    def get_summary(self):
+        """
+        Returns dict with settings, all shifts with their enrollment limits
+        and member counts and next autostart date. Summary is cached for
+        SUMMARY_CACHE_TIMEOUT, so member counts can be a bit outdated
+        """
+        cache_key = get_course_cache_key("summary", self.course_key)
+        summary = cache.get(cache_key)
+        if summary is not None:
+            return summary
+
+        shifts = list(self.get_all_shifts())
+        serial_shifts = []
+        for shift in shifts:
+            enroll_start, enroll_finish = shift.get_enrollment_limits(self.settings)
+            serial_shifts.append({
+                "name": shift.name,
+                "start_date": str(shift.start_date),
+                "days_shift": shift.days_shift,
+                "member_count": shift.member_count,
+                "enroll_start": str(enroll_start),
+                "enroll_finish": str(enroll_finish),
+            })
+        serial_settings = dict(self.get_serial_settings().data)
+        serial_settings.pop('course_key')
+        last_start_date = shifts[0].start_date if shifts else None
+        next_autostart_date = self.settings.get_next_autostart_date(last_start_date=last_start_date)
+        summary = {
+            "settings": serial_settings,
+            "shifts": serial_shifts,
+            "next_autostart_date": next_autostart_date and str(next_autostart_date),
+        }
+        cache.set(cache_key, summary, self.SUMMARY_CACHE_TIMEOUT)
+        return summary
+
     def get_serial_settings(self):
         return CourseShiftSettingsSerializer(self.settings)
\ No newline at end of file
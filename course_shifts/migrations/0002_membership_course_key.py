@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.conf import settings
+import openedx.core.djangoapps.xmodule_django.models
+
+
+def fill_membership_course_key(apps, schema_editor):
+    """
+    Copies course_key of the shift group to its memberships
+    """
+    CourseShiftGroup = apps.get_model('course_shifts', 'CourseShiftGroup')
+    CourseShiftGroupMembership = apps.get_model('course_shifts', 'CourseShiftGroupMembership')
+    for group in CourseShiftGroup.objects.all():
+        CourseShiftGroupMembership.objects.filter(course_shift_group=group).update(course_key=group.course_key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('course_shifts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseshiftgroupmembership',
+            name='course_key',
+            field=openedx.core.djangoapps.xmodule_django.models.CourseKeyField(help_text=b"Course of the shift group, copied to look up user's membership without join", max_length=255, null=True),
+        ),
+        migrations.RunPython(fill_membership_course_key, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='courseshiftgroupmembership',
+            name='course_key',
+            field=openedx.core.djangoapps.xmodule_django.models.CourseKeyField(help_text=b"Course of the shift group, copied to look up user's membership without join", max_length=255),
+        ),
+        migrations.AlterUniqueTogether(
+            name='courseshiftgroupmembership',
+            unique_together=set([('user', 'course_key')]),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def fill_member_count(apps, schema_editor):
+    """
+    Counts memberships of existing shifts
+    """
+    CourseShiftGroup = apps.get_model('course_shifts', 'CourseShiftGroup')
+    CourseShiftGroupMembership = apps.get_model('course_shifts', 'CourseShiftGroupMembership')
+    counts = CourseShiftGroupMembership.objects.values_list('course_shift_group_id').annotate(
+        models.Count('id')
+    ).order_by()
+    for shift_id, member_count in counts:
+        CourseShiftGroup.objects.filter(pk=shift_id).update(member_count=member_count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course_shifts', '0002_membership_course_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseshiftgroup',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0, help_text=b'Number of users in the shift, maintained at membership changes'),
+        ),
+        migrations.RunPython(fill_member_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course_shifts', '0003_courseshiftgroup_member_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseshiftsettings',
+            name='course_start',
+            field=models.DateField(help_text=b'Course start date, copied from the course at publishing', null=True, blank=True),
+        ),
+    ]
@@ -1,18 +1,23 @@
 """
 This file contains the logic for course shifts.
 """
+import time
+from collections import Counter, OrderedDict
 from logging import getLogger
 
 from datetime import timedelta
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
-from django.db import models, IntegrityError
+from django.db import models, transaction, IntegrityError
 from django.utils import timezone
 from opaque_keys.edx.keys import CourseKey
 from openedx.core.djangoapps.course_groups.models import CourseUserGroup, CourseKeyField
 from xmodule.modulestore.django import modulestore
 
+from .cache_utils import bump_course_cache_version, get_course_cache_key, run_on_commit
+
 log = getLogger(__name__)
 
 
@@ -44,6 +49,10 @@ class CourseShiftGroup(models.Model):
         default=0,
         help_text="Days to add to the block's due"
     )
+    member_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of users in the shift, maintained at membership changes"
+    )
 
     class Meta:
         unique_together = ('course_key', 'start_date',)
@@ -75,6 +84,7 @@ class CourseShiftGroup(models.Model):
             raise ValueError("Shift with name {} already exists for {}".format(value, str(self.course_key)))
         self.course_user_group.name = value
         self.course_user_group.save()
+        bump_course_cache_version(self.course_key)
 
     def set_start_date(self, value):
         if self.start_date == value:
@@ -87,12 +97,21 @@ class CourseShiftGroup(models.Model):
         self.start_date = value
         self.save()
 
-    def get_shifted_date(self, user, date):
+    def has_user(self, user):
+        """
+        Checks user's presence in the shift group without
+        loading all group members
+        """
+        return self.users.filter(pk=user.pk).exists()
+
+    def get_shifted_date(self, user, date, check_membership=True):
         """
         Returns shifted due or start date according to
-        the settings
+        the settings.
+        check_membership can be set to False if shift is already got from
+        the user's membership, then no query is made.
         """
-        if user not in self.users.all():
+        if check_membership and not self.has_user(user):
             raise ValueError("User '{}' is not in shift '{}'".format(
                 user.username,
                 str(self)
@@ -114,19 +133,32 @@ class CourseShiftGroup(models.Model):
     def is_enrollable_now(self, shift_settings=None):
         if not shift_settings:
             shift_settings = self.settings
-        date_start, date_end = self.get_enrollment_limits(shift_settings)
-        if date_start < date_now() < date_end:
-            return True
-        return False
+        first_start_date, last_start_date = shift_settings.get_enrollable_start_dates()
+        return first_start_date <= self.start_date <= last_start_date
 
     @classmethod
     def get_course_shifts(cls, course_key):
         """
-        Returns all shifts groups for given course
+        Returns all shifts groups for given course with
+        their CourseUserGroups
         """
         if not isinstance(course_key, CourseKey):
             raise TypeError("course_key must be CourseKey, not {}".format(type(course_key)))
-        return cls.objects.filter(course_key=course_key).order_by('-start_date')
+        return cls.objects.filter(course_key=course_key).select_related('course_user_group').order_by('-start_date')
+
+    @classmethod
+    def get_enrollable_shifts(cls, course_key, shift_settings, later_than=None):
+        """
+        Returns shifts of the course which are open for enrollment now.
+        If 'later_than' date is given, shifts started after it are open
+        regardless of their enrollment finish.
+        Filter is a start_date range, made by (course_key, start_date) index
+        """
+        first_start_date, last_start_date = shift_settings.get_enrollable_start_dates()
+        window = models.Q(start_date__gte=first_start_date)
+        if later_than:
+            window |= models.Q(start_date__gt=later_than)
+        return cls.get_course_shifts(course_key).filter(window, start_date__lte=last_start_date)
 
     @classmethod
     def get_shift(cls, course_key, name):
@@ -136,7 +168,10 @@ class CourseShiftGroup(models.Model):
         if not isinstance(course_key, CourseKey):
             raise TypeError("course_key must be CourseKey, not {}".format(type(course_key)))
         try:
-            return cls.objects.get(course_key=course_key, course_user_group__name=name)
+            return cls.objects.select_related('course_user_group').get(
+                course_key=course_key,
+                course_user_group__name=name
+            )
         except:
             return None
 
@@ -167,6 +202,32 @@ class CourseShiftGroup(models.Model):
         is_created = created_group and created_shift
         return course_shift_group, is_created
 
+    @classmethod
+    def bulk_create_shifts(cls, course_key, shifts_data):
+        """
+        Creates shifts and their CourseUserGroups with batched inserts.
+        shifts_data is a list of (name, start_date, days_shift) tuples.
+        Should be called inside transaction: IntegrityError is raised
+        if any of the shifts or groups already exists
+        """
+        CourseUserGroup.objects.bulk_create([
+            CourseUserGroup(name=name, course_id=course_key, group_type=CourseUserGroup.SHIFT)
+            for name, _, _ in shifts_data
+        ])
+        user_group_ids = dict(CourseUserGroup.objects.filter(
+            course_id=course_key,
+            name__in=[x[0] for x in shifts_data]
+        ).values_list('name', 'id'))
+        cls.objects.bulk_create([
+            cls(
+                course_user_group_id=user_group_ids[name],
+                course_key=course_key,
+                start_date=start_date,
+                days_shift=days_shift
+            )
+            for name, start_date, days_shift in shifts_data
+        ])
+
     def __unicode__(self):
         return u"'{}' in '{}'".format(self.name, str(self.course_key))
 
@@ -183,24 +244,67 @@ class CourseShiftGroup(models.Model):
             ))
         if not self.pk:
             log.info("New shift group is created: '{}'".format(str(self)))
+        elif kwargs.get('update_fields') is None:
+            # member_count is changed only by F() updates, stale value mustn't be saved
+            kwargs['update_fields'] = [
+                x.name for x in self._meta.concrete_fields
+                if not x.primary_key and x.name != 'member_count'
+            ]
         return super(CourseShiftGroup, self).save(*args, **kwargs)
 
+    @classmethod
+    def change_member_count(cls, shift_id, delta):
+        """
+        Atomically changes member_count of the shift at delta
+        """
+        if delta:
+            cls.objects.filter(pk=shift_id).update(member_count=models.F('member_count') + delta)
+
+    @classmethod
+    def reconcile_member_counts(cls, course_key=None):
+        """
+        Sets member_count of the shifts to the actual number of memberships.
+        If course_key is not given, shifts of all courses are reconciled.
+        Returns number of fixed shifts
+        """
+        shifts = cls.objects.all()
+        memberships = CourseShiftGroupMembership.objects.all()
+        if course_key:
+            shifts = shifts.filter(course_key=course_key)
+            memberships = memberships.filter(course_key=course_key)
+        actual_counts = dict(
+            memberships.values_list('course_shift_group_id').annotate(models.Count('id')).order_by()
+        )
+        fixed_count = 0
+        for shift_id, member_count in shifts.values_list('id', 'member_count'):
+            actual_count = actual_counts.get(shift_id, 0)
+            if actual_count != member_count:
+                log.info("Shift {} member_count is fixed: {} -> {}".format(shift_id, member_count, actual_count))
+                cls.objects.filter(pk=shift_id).update(member_count=actual_count)
+                fixed_count += 1
+        return fixed_count
+
 
 class CourseShiftGroupMembership(models.Model):
     """
     Represents membership in CourseShiftGroup. At any changes it
     updates CourseUserGroup.
     """
+    BULK_CHUNK_SIZE = 1000
+    BULK_CHUNK_RETRIES = 3
+    USER_SHIFT_CACHE_KEY = "user_shift"
+    USER_SHIFT_CACHE_TIMEOUT = 60 * 60 * 24
+
     user = models.ForeignKey(User, related_name="shift_membership")
     course_shift_group = models.ForeignKey(CourseShiftGroup)
+    course_key = CourseKeyField(
+        max_length=255,
+        help_text="Course of the shift group, copied to look up user's membership without join")
 
     class Meta:
+        unique_together = ('user', 'course_key',)
         app_label = 'course_shifts'
 
-    @property
-    def course_key(self):
-        return self.course_shift_group.course_key
-
     @classmethod
     def get_user_membership(cls, user, course_key):
         """
@@ -209,11 +313,58 @@ class CourseShiftGroupMembership(models.Model):
         if not course_key:
             raise ValueError("Got course_key {}".format(str(course_key)))
         try:
-            course_membership = cls.objects.get(user=user, course_shift_group__course_key=course_key)
+            course_membership = cls.objects.select_related(
+                'course_shift_group__course_user_group'
+            ).get(user=user, course_key=course_key)
         except cls.DoesNotExist:
             course_membership = None
         return course_membership
 
+    @classmethod
+    def _user_shift_cache_key(cls, user_id, course_key):
+        return get_course_cache_key(cls.USER_SHIFT_CACHE_KEY, course_key, user_id)
+
+    @classmethod
+    def get_user_shift_data(cls, user_id, course_key):
+        """
+        Returns tuple (shift id, days_shift) of user's shift in the course
+        or None if user has no shift. Result is kept in the django cache, users
+        without shift are cached too. Cached value is updated at membership
+        changes, and all course values are dropped by course cache version bump.
+        Value read from the database is only added to the cache, so it can't
+        overwrite the value written by concurrent membership change
+        """
+        cache_key = cls._user_shift_cache_key(user_id, course_key)
+        shift_data = cache.get(cache_key)
+        if shift_data is None:
+            shift_data = cls.objects.filter(
+                user_id=user_id,
+                course_key=course_key
+            ).values_list('course_shift_group_id', 'course_shift_group__days_shift').first()
+            shift_data = tuple(shift_data or ())
+            cache.add(cache_key, shift_data, cls.USER_SHIFT_CACHE_TIMEOUT)
+        return shift_data or None
+
+    @classmethod
+    def _set_cached_user_shift(cls, user_id, course_key, course_shift_group):
+        """
+        Writes user's shift to the cache after the membership change is committed,
+        so rolled back change isn't served from the cache
+        """
+        cls._set_cached_users_shift([user_id], course_key, course_shift_group)
+
+    @classmethod
+    def _set_cached_users_shift(cls, user_ids, course_key, course_shift_group):
+        shift_data = ()
+        if course_shift_group:
+            shift_data = (course_shift_group.id, course_shift_group.days_shift)
+        values = dict((cls._user_shift_cache_key(x, course_key), shift_data) for x in user_ids)
+        run_on_commit(lambda: cache.set_many(values, cls.USER_SHIFT_CACHE_TIMEOUT))
+
+    @classmethod
+    def _delete_cached_user_shift(cls, user_id, course_key):
+        cache.delete(cls._user_shift_cache_key(user_id, course_key))
+
     @classmethod
     def transfer_user(cls, user, course_shift_group_from, course_shift_group_to):
         """
@@ -252,6 +403,153 @@ class CourseShiftGroupMembership(models.Model):
         if course_shift_group_to:
             return cls.objects.create(user=user, course_shift_group=course_shift_group_to)
 
+    @classmethod
+    def bulk_transfer_users(cls, user_ids, course_key, course_shift_group_to):
+        """
+        Transfers users with given ids to 'course_shift_group_to' from any
+        shift of the course, or enrolls them if they don't have membership.
+        If 'course_shift_group_to' is None, users are unenrolled.
+        Users are processed by chunks, every chunk in its own transaction
+        with batched deletes and inserts of memberships and CourseUserGroup users.
+        Chunk failed by concurrent membership change is retried, if it still
+        fails IntegrityError is raised and previous chunks stay committed
+        (if method is called outside of transaction, e.g. in non atomic request).
+        Returns dict with numbers of 'enrolled', 'transferred', 'unenrolled'
+        and 'unchanged' users
+        """
+        if course_shift_group_to and course_shift_group_to.course_key != course_key:
+            raise ValueError("Shift's course_key: '{}', not '{}'".format(
+                str(course_shift_group_to.course_key),
+                str(course_key)
+            ))
+        result = {"enrolled": 0, "transferred": 0, "unenrolled": 0, "unchanged": 0}
+        unique_ids = list(OrderedDict.fromkeys(user_ids))
+        for index in range(0, len(unique_ids), cls.BULK_CHUNK_SIZE):
+            chunk = unique_ids[index:index + cls.BULK_CHUNK_SIZE]
+            chunk_result = cls._bulk_transfer_chunk_with_retries(chunk, course_key, course_shift_group_to)
+            for key in result:
+                result[key] += chunk_result[key]
+        log.info("Users are transferred to shift '{}' in {}: {}".format(
+            str(course_shift_group_to),
+            str(course_key),
+            str(result)
+        ))
+        return result
+
+    @classmethod
+    def transfer_users(cls, memberships, course_shift_group_to):
+        """
+        Moves all memberships from given queryset to 'course_shift_group_to'.
+        Memberships from other courses are ignored. Memberships and CourseUserGroup
+        users are moved by set-based updates in single transaction, whatever
+        the number of users.
+        Returns number of moved memberships
+        """
+        moved_count = cls._move_memberships(memberships, course_shift_group_to)
+        # Moved users aren't known here, so all cached data of the course is dropped
+        bump_course_cache_version(course_shift_group_to.course_key)
+        log.info("{} users are transferred to shift '{}'".format(moved_count, str(course_shift_group_to)))
+        return moved_count
+
+    @classmethod
+    def _move_memberships(cls, memberships, course_shift_group_to):
+        """
+        Moves memberships and CourseUserGroup users without cache invalidation,
+        caller is responsible for it. Returns number of moved memberships
+        """
+        memberships = memberships.filter(
+            course_key=course_shift_group_to.course_key
+        ).exclude(
+            course_shift_group=course_shift_group_to
+        )
+        user_groups_from = CourseShiftGroup.objects.filter(
+            id__in=memberships.values('course_shift_group_id')
+        ).values('course_user_group_id')
+        users_through = CourseUserGroup.users.through
+        with transaction.atomic():
+            counts_from = list(
+                memberships.values_list('course_shift_group_id').annotate(models.Count('id')).order_by()
+            )
+            users_through.objects.filter(
+                courseusergroup_id__in=user_groups_from,
+                user_id__in=memberships.values('user_id')
+            ).update(courseusergroup_id=course_shift_group_to.course_user_group_id)
+            moved_count = memberships.update(course_shift_group=course_shift_group_to)
+            for shift_id, count in counts_from:
+                CourseShiftGroup.change_member_count(shift_id, -count)
+            CourseShiftGroup.change_member_count(course_shift_group_to.id, moved_count)
+        return moved_count
+
+    @classmethod
+    def _bulk_transfer_chunk_with_retries(cls, user_ids, course_key, course_shift_group_to):
+        """
+        Transfers chunk of users. Memberships are read before the chunk transaction,
+        so concurrent membership change can fail the chunk, then it is retried
+        with the fresh memberships
+        """
+        for attempt in range(1, cls.BULK_CHUNK_RETRIES + 1):
+            try:
+                return cls._bulk_transfer_chunk(user_ids, course_key, course_shift_group_to)
+            except IntegrityError:
+                if attempt == cls.BULK_CHUNK_RETRIES:
+                    raise
+                log.info("Memberships in {} are changed concurrently, chunk is retried".format(str(course_key)))
+
+    @classmethod
+    def _bulk_transfer_chunk(cls, user_ids, course_key, course_shift_group_to):
+        group_to_id = course_shift_group_to and course_shift_group_to.id
+        current_groups = dict(
+            cls.objects.filter(course_key=course_key, user_id__in=user_ids).values_list(
+                'user_id', 'course_shift_group_id'
+            )
+        )
+        unchanged_ids = [x for x in user_ids if current_groups.get(x) == group_to_id]
+        moved_ids = [x for x in user_ids if x in current_groups and current_groups[x] != group_to_id]
+        new_ids = []
+        if group_to_id:
+            new_ids = [x for x in user_ids if x not in current_groups]
+
+        users_through = CourseUserGroup.users.through
+        with transaction.atomic():
+            moved_memberships = cls.objects.filter(course_key=course_key, user_id__in=moved_ids)
+            if moved_ids and group_to_id:
+                # Moved users are cached at the end of the chunk, course cache is kept
+                cls._move_memberships(moved_memberships, course_shift_group_to)
+            elif moved_ids:
+                user_groups_from_ids = CourseShiftGroup.objects.filter(
+                    id__in=set(current_groups[x] for x in moved_ids)
+                ).values_list('course_user_group_id', flat=True)
+                users_through.objects.filter(
+                    courseusergroup_id__in=list(user_groups_from_ids),
+                    user_id__in=moved_ids
+                ).delete()
+                moved_memberships.delete()
+                for shift_id, count in Counter(current_groups[x] for x in moved_ids).iteritems():
+                    CourseShiftGroup.change_member_count(shift_id, -count)
+
+            if new_ids:
+                user_group_to_id = course_shift_group_to.course_user_group_id
+                cls.objects.bulk_create([
+                    cls(user_id=x, course_shift_group_id=group_to_id, course_key=course_key)
+                    for x in new_ids
+                ])
+                present_ids = set(users_through.objects.filter(
+                    courseusergroup_id=user_group_to_id,
+                    user_id__in=new_ids
+                ).values_list('user_id', flat=True))
+                users_through.objects.bulk_create([
+                    users_through(courseusergroup_id=user_group_to_id, user_id=x)
+                    for x in new_ids if x not in present_ids
+                ])
+                CourseShiftGroup.change_member_count(group_to_id, len(new_ids))
+        cls._set_cached_users_shift(moved_ids + new_ids, course_key, course_shift_group_to)
+        return {
+            "enrolled": len(new_ids),
+            "transferred": len(moved_ids) if group_to_id else 0,
+            "unenrolled": 0 if group_to_id else len(moved_ids),
+            "unchanged": len(unchanged_ids),
+        }
+
     @classmethod
     def _push_add_to_group(cls, course_shift_group, user):
         """
@@ -266,7 +564,7 @@ class CourseShiftGroupMembership(models.Model):
                 course_shift_group.name
             ))
 
-        if user not in course_shift_group.users.all():
+        if not course_shift_group.has_user(user):
             course_shift_group.course_user_group.users.add(user)
 
     @classmethod
@@ -282,25 +580,35 @@ class CourseShiftGroupMembership(models.Model):
                 user.username,
                 membership_group.name
             ))
-        if user not in course_shift_group.course_user_group.users.all():
+        if not course_shift_group.has_user(user):
             raise IntegrityError("User {} is not in {}".format(user.username, course_shift_group.name))
         course_shift_group.course_user_group.users.remove(user)
 
     def save(self, *args, **kwargs):
         if self.pk:
             raise ValueError("CourseShiftGroupMembership can't be changed, only deleted")
-        current_membership = self.get_user_membership(self.user, self.course_key)
-        if current_membership:
-            raise ValueError("User already has membership for this course: {}".format(
-                str(current_membership)
+        self.course_key = self.course_shift_group.course_key
+        try:
+            with transaction.atomic():
+                save_result = super(CourseShiftGroupMembership, self).save(*args, **kwargs)
+                CourseShiftGroup.change_member_count(self.course_shift_group_id, 1)
+        except IntegrityError:
+            raise ValueError("User '{}' already has membership for this course: {}".format(
+                self.user.username,
+                str(self.course_key)
             ))
-        save_result = super(CourseShiftGroupMembership, self).save(*args, **kwargs)
         log.info("User '{}' is enrolled in shift '{}'".format(
             self.user.username,
             str(self.course_shift_group))
         )
-        if self.user not in self.course_shift_group.users.all():
-            self._push_add_to_group(self.course_shift_group, self.user)
+        try:
+            if not self.course_shift_group.has_user(self.user):
+                self._push_add_to_group(self.course_shift_group, self.user)
+        except Exception:
+            # Value could be cached from the uncommitted membership
+            self._delete_cached_user_shift(self.user_id, self.course_key)
+            raise
+        self._set_cached_user_shift(self.user_id, self.course_key, self.course_shift_group)
         return save_result
 
     def delete(self, *args, **kwargs):
@@ -308,8 +616,15 @@ class CourseShiftGroupMembership(models.Model):
             self.user.username,
             str(self.course_shift_group))
         )
-        super(CourseShiftGroupMembership, self).delete(*args, **kwargs)
-        self._push_delete_from_group(self.user, self.course_shift_group)
+        with transaction.atomic():
+            super(CourseShiftGroupMembership, self).delete(*args, **kwargs)
+            CourseShiftGroup.change_member_count(self.course_shift_group_id, -1)
+        try:
+            self._push_delete_from_group(self.user, self.course_shift_group)
+        except Exception:
+            self._delete_cached_user_shift(self.user_id, self.course_key)
+            raise
+        self._set_cached_user_shift(self.user_id, self.course_key, None)
 
     def __unicode__(self):
         return u"'{}' in '{}'".format(
@@ -322,6 +637,16 @@ class CourseShiftSettings(models.Model):
     """
     Describes Course Shift settings for start and due dates in the specific course run.
     """
+    COURSE_ENABLE_FIELD_NAME = "enable_course_shifts"
+    ENABLED_COURSES_CACHE_KEY = "course_shifts.enabled_course_keys"
+    ENABLED_COURSES_CACHE_TIMEOUT = 60 * 60
+    SETTINGS_CACHE_KEY = "settings"
+    SETTINGS_CACHE_TIMEOUT = 60 * 60 * 24
+    SETTINGS_LOCK_KEY = u"course_shifts.settings_lock.{}"
+    SETTINGS_LOCK_TIMEOUT = 5
+    SETTINGS_LOCK_WAIT = 0.05
+    SETTINGS_LOCK_RETRIES = 20
+
     course_key = CourseKeyField(
         max_length=255,
         db_index=True,
@@ -364,6 +689,12 @@ class CourseShiftSettings(models.Model):
         validators=[MinValueValidator(0)]
     )
 
+    course_start = models.DateField(
+        null=True,
+        blank=True,
+        help_text="Course start date, copied from the course at publishing"
+    )
+
     class Meta:
         app_label = 'course_shifts'
 
@@ -388,13 +719,61 @@ class CourseShiftSettings(models.Model):
 
     @property
     def course_start_date(self):
-        return self.course.start.date()
+        """
+        Course start date is stored in settings at course publish and by
+        sync_course_shifts command. Course is loaded from the modulestore
+        only if it isn't stored yet, nothing is written here
+        """
+        if self.course_start is None:
+            return self.course.start.date()
+        return self.course_start
 
     @classmethod
     def get_course_settings(cls, course_key):
+        """
+        Returns shift settings for given course. Settings are read through
+        the django cache, at cache miss only one process loads them from the
+        database while others wait for the cached value.
+        If course has no settings, unsaved default settings are returned,
+        they are created at the first save
+        """
+        cache_key = get_course_cache_key(cls.SETTINGS_CACHE_KEY, course_key)
+        current_settings = cache.get(cache_key)
+        if current_settings is not None:
+            return current_settings
+
+        lock_key = cls.SETTINGS_LOCK_KEY.format(unicode(course_key))
+        for __ in range(cls.SETTINGS_LOCK_RETRIES):
+            if cache.add(lock_key, True, cls.SETTINGS_LOCK_TIMEOUT):
+                break
+            time.sleep(cls.SETTINGS_LOCK_WAIT)
+            current_settings = cache.get(cache_key)
+            if current_settings is not None:
+                return current_settings
+        else:
+            log.warning("Settings for {} are loaded without lock".format(str(course_key)))
+            return cls._load_course_settings(course_key)
+        try:
+            current_settings = cache.get(cache_key)
+            if current_settings is None:
+                current_settings = cls._load_course_settings(course_key)
+                cache.set(cache_key, current_settings, cls.SETTINGS_CACHE_TIMEOUT)
+        finally:
+            cache.delete(lock_key)
+        return current_settings
+
+    @classmethod
+    def _load_course_settings(cls, course_key):
+        current_settings = cls.objects.filter(course_key=course_key).first()
+        if current_settings is None:
+            current_settings = cls(course_key=course_key)
+        return current_settings
+
+    @classmethod
+    def get_or_create_course_settings(cls, course_key):
         """
         Return shift settings for given course. Creates
-        if doesn't exist
+        if doesn't exist. Should be used only to change settings
         """
         current_settings, created = cls.objects.get_or_create(course_key=course_key)
         if created:
@@ -403,6 +782,102 @@ class CourseShiftSettings(models.Model):
             ))
         return current_settings
 
+    @classmethod
+    def get_enabled_course_keys(cls):
+        """
+        Returns set of string course keys for which shifts are enabled.
+        Set is cached and dropped at any settings change
+        """
+        course_keys = cache.get(cls.ENABLED_COURSES_CACHE_KEY)
+        if course_keys is None:
+            enabled = cls.objects.filter(is_shift_enabled=True).values_list('course_key', flat=True)
+            course_keys = frozenset(unicode(x) for x in enabled)
+            cache.set(cls.ENABLED_COURSES_CACHE_KEY, course_keys, cls.ENABLED_COURSES_CACHE_TIMEOUT)
+        return course_keys
+
+    @classmethod
+    def invalidate_enabled_course_keys(cls):
+        """
+        Drops cached set of enabled courses after the current transaction
+        is committed, so set read before the commit isn't kept
+        """
+        run_on_commit(lambda: cache.delete(cls.ENABLED_COURSES_CACHE_KEY))
+
+    @classmethod
+    def sync_is_shift_enabled(cls, course):
+        """
+        Enables shifts if they are turned on in the course advanced settings.
+        Settings are created only for such courses.
+        Returns True if shifts became enabled
+        """
+        if not getattr(course, cls.COURSE_ENABLE_FIELD_NAME, False):
+            return False
+        current_settings = cls.get_or_create_course_settings(course.id)
+        if current_settings.is_shift_enabled:
+            return False
+        current_settings._course = course
+        current_settings.is_shift_enabled = True
+        current_settings.save()
+        log.info("Shifts are enabled for {}".format(str(course.id)))
+        return True
+
+    def save(self, *args, **kwargs):
+        if kwargs.get('force_insert'):
+            # Explicit creation (objects.create, get_or_create) must fail
+            # with IntegrityError if settings already exist
+            return super(CourseShiftSettings, self).save(*args, **kwargs)
+        if not self.pk:
+            # Default settings can be saved when settings are already created concurrently
+            self.pk = self._get_saved_pk()
+        if not self.pk:
+            try:
+                with transaction.atomic():
+                    return super(CourseShiftSettings, self).save(*args, **kwargs)
+            except IntegrityError:
+                # Settings are created concurrently after the check, they are updated
+                self.pk = self._get_saved_pk()
+                if not self.pk:
+                    raise
+        if kwargs.get('update_fields') is None:
+            # course_start is changed only by course publishing, stale value mustn't be saved
+            kwargs['update_fields'] = [
+                x.name for x in self._meta.concrete_fields
+                if not x.primary_key and x.name != 'course_start'
+            ]
+        return super(CourseShiftSettings, self).save(*args, **kwargs)
+
+    def _get_saved_pk(self):
+        return CourseShiftSettings.objects.filter(
+            course_key=self.course_key
+        ).values_list('pk', flat=True).first()
+
+    @classmethod
+    def sync_course_start_date(cls, course):
+        """
+        Stores course start date in the course settings. If start date
+        is moved, days_shift of all course shifts is changed so that their
+        start dates are kept.
+        Returns True if start date is changed
+        """
+        current_settings = cls.objects.filter(course_key=course.id).first()
+        if not current_settings or not course.start:
+            return False
+        new_start = course.start.date()
+        old_start = current_settings.course_start
+        if old_start == new_start:
+            return False
+        with transaction.atomic():
+            cls.objects.filter(pk=current_settings.pk).update(course_start=new_start)
+            if old_start:
+                CourseShiftGroup.objects.filter(course_key=course.id).update(
+                    days_shift=models.F('days_shift') + (old_start - new_start).days
+                )
+        bump_course_cache_version(course.id)
+        log.info("Course start date for {} is changed: {} -> {}".format(
+            str(course.id), str(old_start), str(new_start)
+        ))
+        return True
+
     def build_default_name(self, **kwargs):
         """
         :param start_date
@@ -418,16 +893,33 @@ class CourseShiftSettings(models.Model):
         """
         return int((start_date - self.course_start_date).days)
 
-    def get_next_autostart_date(self):
+    def get_next_autostart_date(self, last_start_date=None):
         """
         In autostart mode returns date when next shift starts
-        In manual mode returns None
+        In manual mode returns None.
+        last_start_date can be given if shifts are already loaded
         """
         if not self.is_autostart:
             return
-        if not self.last_start_date:
+        if not last_start_date:
+            last_start_date = self.last_start_date
+        if not last_start_date:
             return self.course_start_date
-        return self.last_start_date + timedelta(days=self.autostart_period_days)
+        return last_start_date + timedelta(days=self.autostart_period_days)
+
+    def get_enrollable_start_dates(self, date=None):
+        """
+        Returns first and last (inclusive) start dates of the shifts that are
+        open for enrollment at given date, today by default.
+        Enrollment is open after 'enroll_before_days' before shift start
+        till 'enroll_after_days' after it
+        """
+        if not date:
+            date = date_now()
+        return (
+            date - timedelta(days=self.enroll_after_days),
+            date + timedelta(days=self.enroll_before_days - 1)
+        )
 
     def _calculate_launch_date(self, start_date):
         """
@@ -437,39 +929,60 @@ class CourseShiftSettings(models.Model):
         """
         return start_date - timedelta(days=self.enroll_before_days)
 
-    def update_shifts_autostart(self):
+    def get_missing_autostart_dates(self):
         """
-        Creates new shifts if required by autostart settings
+        Returns start dates of autostart shifts that should be launched
+        by now but aren't created yet. Dates are calculated from the
+        next autostart date and the period without creating shifts one by one
         """
-        if not (self.is_autostart and self.is_shift_enabled):
-            return
         start_date = self.get_next_autostart_date()
         if not start_date:
-            return
+            return []
         launch_date = self._calculate_launch_date(start_date)
-        while launch_date < date_now():
-            name = "auto_" + self.build_default_name(start_date=start_date)
-            days_shift = self.calculate_days_shift(start_date=start_date)
-
-            group, created = CourseShiftGroup.create(
-                name=name,
-                start_date=start_date,
-                days_shift=days_shift,
-                course_key=self.course_key
-            )
-            if created:
-                log.info("Shift {} automatically created, launch date is {}; start date is {}, enroll_before is {}".format(
-                    str(group),
-                    str(launch_date),
-                    str(start_date),
-                    str(self.enroll_before_days)
-                ))
-            start_date = self.get_next_autostart_date()
-            launch_date = self._calculate_launch_date(start_date)
+        days_to_now = (date_now() - launch_date).days
+        if days_to_now <= 0:
+            return []
+        period = self.autostart_period_days
+        if not period:
+            return [start_date]
+        shifts_number = (days_to_now - 1) // period + 1
+        return [start_date + timedelta(days=period * x) for x in range(shifts_number)]
 
-    def save(self, *args, **kwargs):
-        self.update_shifts_autostart()
-        return super(CourseShiftSettings, self).save(*args, **kwargs)
+    def update_shifts_autostart(self):
+        """
+        Creates new shifts if required by autostart settings.
+        All missing shifts are inserted in one transaction. If some of them are
+        created concurrently, shifts are created one by one, that is idempotent.
+        """
+        if not (self.is_autostart and self.is_shift_enabled):
+            return
+        start_dates = self.get_missing_autostart_dates()
+        if not start_dates:
+            return
+        shifts_data = [
+            ("auto_" + self.build_default_name(start_date=x), x, self.calculate_days_shift(start_date=x))
+            for x in start_dates
+        ]
+        try:
+            with transaction.atomic():
+                CourseShiftGroup.bulk_create_shifts(self.course_key, shifts_data)
+            bump_course_cache_version(self.course_key)
+        except IntegrityError:
+            log.info("Autostart shifts for {} are created concurrently, creating them one by one".format(
+                str(self.course_key)
+            ))
+            for name, start_date, days_shift in shifts_data:
+                CourseShiftGroup.create(
+                    name=name,
+                    start_date=start_date,
+                    days_shift=days_shift,
+                    course_key=self.course_key
+                )
+        log.info("Autostart shifts created for {}: start dates are {}, enroll_before is {}".format(
+            str(self.course_key),
+            ", ".join(str(x) for x in start_dates),
+            str(self.enroll_before_days)
+        ))
 
     def __unicode__(self):
         text = u"{}; -{}/+{} days,".format(
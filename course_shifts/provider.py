@@ -1,6 +1,17 @@
+from datetime import timedelta
+
+import request_cache
 from lms.djangoapps.courseware.field_overrides import FieldOverrideProvider
 
 from .manager import CourseShiftManager
+from .models import CourseShiftSettings
+from .schedule import (
+    COURSE_SHIFTED_FIELDS,
+    BLOCK_SHIFTED_FIELDS,
+    BLOCK_SHIFTED_CATEGORIES,
+    get_course_schedule,
+    get_default_fallback_field_value,
+)
 
 
 class CourseShiftOverrideProvider(FieldOverrideProvider):
@@ -9,17 +20,10 @@ class CourseShiftOverrideProvider(FieldOverrideProvider):
     based on user's membership in CourseShiftGroups
     """
 
-    COURSE_OVERRIDEN_NAMES = (
-        'due',
-    )
-    BLOCK_OVERRIDEN_NAMES = (
-        'due',
-        'start'
-    )
-    BLOCK_OVERRIDEN_CATEGORIES = (
-        'chapter',
-        'sequential',
-    )
+    COURSE_OVERRIDEN_NAMES = COURSE_SHIFTED_FIELDS
+    BLOCK_OVERRIDEN_NAMES = BLOCK_SHIFTED_FIELDS
+    BLOCK_OVERRIDEN_CATEGORIES = BLOCK_SHIFTED_CATEGORIES
+    REQUEST_CACHE_NAME = "course_shifts.provider"
 
     def should_shift(self, block, name):
         """
@@ -34,42 +38,60 @@ class CourseShiftOverrideProvider(FieldOverrideProvider):
                 return True
         return False
 
-    def get(self, block, name, default):
-        if not self.should_shift(block, name):
-            return default
+    def get_user_days_shift(self, course_key):
+        """
+        Returns days_shift of user's shift for given course or None.
+        Shift is resolved once per user and course during the request
+        and is reused for all blocks. User's shift is read from the
+        shared django cache, so database is queried only at cache miss.
+        """
+        cache = request_cache.get_cache(self.REQUEST_CACHE_NAME)
+        cache_key = (self.user.id, unicode(course_key))
+        if cache_key not in cache:
+            cache[cache_key] = CourseShiftManager(course_key).get_user_days_shift(self.user)
+        return cache[cache_key]
+
+    def get_base_value(self, block, name):
+        """
+        Returns not shifted field value. It is taken from the precomputed
+        course schedule, block's field data is used only for blocks
+        that are absent in the schedule.
+        """
         course_key = block.location.course_key
-        shift_manager = CourseShiftManager(course_key)
+        cache = request_cache.get_cache(self.REQUEST_CACHE_NAME)
+        cache_key = ('schedule', unicode(course_key))
+        if cache_key not in cache:
+            cache[cache_key] = get_course_schedule(course_key)
+        schedule = cache[cache_key]
+
+        schedule_key = (unicode(block.location), name)
+        if schedule_key in schedule:
+            return schedule[schedule_key]
+        return get_default_fallback_field_value(block, name)
 
-        if not shift_manager.is_enabled:
+    def get(self, block, name, default):
+        if not self.should_shift(block, name):
             return default
-        shift_group = shift_manager.get_user_shift(self.user)
-        if not shift_group:
+        days_shift = self.get_user_days_shift(block.location.course_key)
+        if days_shift is None:
             return default
-        base_value = get_default_fallback_field_value(block, name)
+        base_value = self.get_base_value(block, name)
         if base_value:
-            shifted_value = shift_group.get_shifted_date(self.user, base_value)
-            return shifted_value
+            return base_value + timedelta(days=days_shift)
         return default
 
     @classmethod
     def enabled_for(cls, course):
-        """This simple override provider is always enabled"""
-        return True
-
-
-def get_default_fallback_field_value(block, name):
-    """
-    This function returns value of block's field
-    avoiding recursive entering into the shift provider.
-    """
-    try: # we have LmsFieldData in block during rendering
-        fallback = block._field_data._authored_data._source.fallback
-    except AttributeError: #we have Kvs or InheritingFieldData in block
-        fallback = block._field_data
-    base_value = None
-    if fallback.has(block, name):
-        base_value = fallback.get(block, name)
-    return base_value
+        """
+        Provider is enabled only for courses with shifts, so it is
+        skipped for all other courses without any database queries.
+        Course isn't always given, then provider is enabled
+        """
+        if course is None:
+            return True
+        if getattr(course, CourseShiftManager.SHIFT_COURSE_FIELD_NAME, False):
+            return True
+        return unicode(course.id) in CourseShiftSettings.get_enabled_course_keys()
 
 
 def _get_default_scoped_field_value(block, name):
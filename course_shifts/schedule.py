@@ -0,0 +1,160 @@
+"""
+This file contains the precomputed course schedule: base (not shifted)
+values of the fields that are shifted by course shifts.
+
+Schedule is built once per course from the modulestore and is kept in the
+django cache until the course is published again. Shifted schedule of the
+CourseShiftGroup is got by adding its days_shift to every value, so change
+of the shift's days_shift doesn't require schedule rebuild.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from logging import getLogger
+
+from django.core.cache import cache
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import modulestore
+
+from .cache_utils import bump_course_cache_version
+
+log = getLogger(__name__)
+
+COURSE_SHIFTED_FIELDS = (
+    'due',
+)
+BLOCK_SHIFTED_FIELDS = (
+    'due',
+    'start'
+)
+BLOCK_SHIFTED_CATEGORIES = (
+    'chapter',
+    'sequential',
+)
+
+SCHEDULE_CACHE_KEY = u"course_shifts.schedule.{}"
+SCHEDULE_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_shifted_fields(category):
+    """
+    Returns names of the fields that are shifted for blocks of given category
+    """
+    if category == 'course':
+        return COURSE_SHIFTED_FIELDS
+    if category in BLOCK_SHIFTED_CATEGORIES:
+        return BLOCK_SHIFTED_FIELDS
+    return ()
+
+
+def get_default_fallback_field_value(block, name):
+    """
+    This function returns value of block's field
+    avoiding recursive entering into the shift provider.
+    """
+    try: # we have LmsFieldData in block during rendering
+        fallback = block._field_data._authored_data._source.fallback
+    except AttributeError: #we have Kvs or InheritingFieldData in block
+        fallback = block._field_data
+    base_value = None
+    if fallback.has(block, name):
+        base_value = fallback.get(block, name)
+    return base_value
+
+
+def _get_schedule_cache_key(course_key):
+    return SCHEDULE_CACHE_KEY.format(unicode(course_key))
+
+
+def is_hidden_from_learners(block):
+    """
+    Checks whether block is visible to staff only or to some groups of learners only
+    """
+    if block.visible_to_staff_only:
+        return True
+    return any(block.group_access.values())
+
+
+def build_course_schedule(course_key):
+    """
+    Collects base values of the shifted fields for course blocks
+    of shifted categories from the published branch. Blocks are got
+    from the course tree, so orphans are skipped, blocks hidden from learners
+    are skipped with their children. Provider gets such blocks values
+    from their field data.
+    Returns dict {(block location string, field name): value}, blocks
+    without value are stored with None.
+    """
+    store = modulestore()
+    schedule = {}
+    with store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+        # Course, chapters and sequentials are loaded
+        course = store.get_course(course_key, depth=2)
+        blocks = [course] if course else []
+        while blocks:
+            block = blocks.pop()
+            if is_hidden_from_learners(block):
+                continue
+            for name in get_shifted_fields(block.category):
+                schedule[(unicode(block.location), name)] = get_default_fallback_field_value(block, name)
+            if block.category in ('course', 'chapter'):
+                blocks.extend(block.get_children())
+    log.info("Schedule for {} is built: {} values".format(str(course_key), len(schedule)))
+    return schedule
+
+
+def get_course_schedule(course_key):
+    """
+    Returns base course schedule, building it if it isn't cached yet
+    """
+    cache_key = _get_schedule_cache_key(course_key)
+    schedule = cache.get(cache_key)
+    if schedule is None:
+        schedule = build_course_schedule(course_key)
+        cache.set(cache_key, schedule, SCHEDULE_CACHE_TIMEOUT)
+    return schedule
+
+
+def invalidate_course_schedule(course_key):
+    """
+    Drops cached schedule and all course data that depends on it.
+    Schedule is rebuilt at the next request
+    """
+    cache.delete(_get_schedule_cache_key(course_key))
+    bump_course_cache_version(course_key)
+
+
+def get_shifted_schedule(schedule, days_shift):
+    """
+    Returns schedule with all values shifted at days_shift days
+    """
+    delta = timedelta(days=days_shift)
+    return dict(
+        (key, value + delta if value else value)
+        for key, value in schedule.iteritems()
+    )
+
+
+def get_deadlines_table(schedule, days_shifts, date_from, date_to, field_name='due'):
+    """
+    Returns dict {days_shift: [(date, block locations)]} with shifted dates
+    of given field between date_from and date_to (inclusive), ordered by date.
+    Shifts without dates in the range are absent. Base dates are grouped
+    by day first, so the table is built for all shifts without going through
+    blocks for every shift
+    """
+    base_dates = defaultdict(list)
+    for (location, name), value in schedule.iteritems():
+        if name == field_name and value:
+            base_dates[value.date()].append(location)
+
+    table = {}
+    for days_shift in set(days_shifts):
+        delta = timedelta(days=days_shift)
+        deadlines = sorted(
+            (base_date + delta, sorted(locations))
+            for base_date, locations in base_dates.iteritems()
+            if date_from <= base_date + delta <= date_to
+        )
+        if deadlines:
+            table[days_shift] = deadlines
+    return table
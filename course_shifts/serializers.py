@@ -57,6 +57,7 @@ class CourseShiftSerializer(serializers.ModelSerializer):
     course_key = CourseKeyField(required=False)
     name = serializers.CharField(max_length=255, allow_null=True)
     start_date = serializers.DateField(allow_null=True)
+    member_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = CourseShiftGroup
@@ -64,6 +65,7 @@ class CourseShiftSerializer(serializers.ModelSerializer):
             'course_key',
             'name',
             'start_date',
+            'member_count',
         )
 
     def error_dict(self):
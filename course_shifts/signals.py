@@ -0,0 +1,44 @@
+"""
+Signal handlers for course shifts.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from xmodule.modulestore.django import SignalHandler, modulestore
+
+from .cache_utils import bump_course_cache_version
+from .models import CourseShiftGroup, CourseShiftSettings
+from .schedule import invalidate_course_schedule
+
+
+@receiver(SignalHandler.course_published)
+def on_course_published(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drops precomputed schedule of the published course,
+    enables shifts if they are turned on in the advanced settings
+    and updates stored course start date
+    """
+    invalidate_course_schedule(course_key)
+    course = modulestore().get_course(course_key)
+    if course:
+        CourseShiftSettings.sync_is_shift_enabled(course)
+        CourseShiftSettings.sync_course_start_date(course)
+
+
+@receiver(post_save, sender=CourseShiftSettings)
+@receiver(post_delete, sender=CourseShiftSettings)
+def on_settings_changed(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drops cached set of courses with enabled shifts
+    """
+    CourseShiftSettings.invalidate_enabled_course_keys()
+
+
+@receiver(post_save, sender=CourseShiftGroup)
+@receiver(post_delete, sender=CourseShiftGroup)
+@receiver(post_save, sender=CourseShiftSettings)
+@receiver(post_delete, sender=CourseShiftSettings)
+def on_course_shifts_changed(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates all cached shifts data of the course
+    """
+    bump_course_cache_version(instance.course_key)
@@ -6,27 +6,78 @@ Run them by
 'course_shifts' must be added to INSTALLED_APPS in test.py
 """
 # pylint: disable=no-member
+import csv
 import datetime
-from django.db import IntegrityError
+import json
+from contextlib import contextmanager
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models.query import QuerySet
+from django.test.utils import CaptureQueriesContext
+from lms.djangoapps.course_blocks.transformers.start_date import StartDateTransformer
+from lms.djangoapps.course_blocks.usage_info import CourseUsageInfo
+from mock import patch
 from nose.plugins.attrib import attr
+from opaque_keys.edx.keys import CourseKey
+from pytz import UTC
+from request_cache.middleware import RequestCache
+from openedx.core.lib.block_structure.factory import BlockStructureFactory
+from rest_framework.test import APIRequestFactory, force_authenticate
+from student.models import CourseEnrollment
 from student.tests.factories import UserFactory
+from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.tests.django_utils import TEST_DATA_MIXED_MODULESTORE, ModuleStoreTestCase
-from xmodule.modulestore.tests.factories import ToyCourseFactory
-
+from xmodule.modulestore.tests.factories import ItemFactory, ToyCourseFactory
+
+from .. import _section_course_shifts
+from ..api import (
+    CourseShiftRosterExportView,
+    CourseShiftSummaryView,
+    CourseShiftUserDeadlinesView,
+    CourseShiftUserUploadView,
+    CourseShiftUsersBatchView,
+)
+from ..autostart import sweep_autostart_shifts, update_course_shifts_autostart
+from ..cache_utils import get_course_cache_key
 from ..manager import CourseShiftManager
 from ..models import CourseShiftGroup, CourseShiftGroupMembership, CourseUserGroup, CourseShiftSettings
+from ..provider import CourseShiftOverrideProvider
+from ..serializers import CourseShiftSerializer
+from ..transformers import CourseShiftTransformer
+from ..schedule import (
+    get_course_schedule,
+    get_default_fallback_field_value,
+    get_shifted_schedule,
+    invalidate_course_schedule,
+)
 
 
 def date_shifted(days):
     return (datetime.datetime.now() + datetime.timedelta(days=days)).date()
 
 
+@contextmanager
+def commit_callbacks_deferred():
+    """
+    Collects transaction.on_commit callbacks and calls them at exit,
+    like they are called at the request transaction commit
+    """
+    callbacks = []
+    with patch.object(transaction, 'on_commit', side_effect=callbacks.append, create=True):
+        yield
+    for func in callbacks:
+        func()
+
+
 @attr(shard=2)
 class TestCourseShiftGroup(ModuleStoreTestCase):
     """
     Test the course shifts feature
     """
     MODULESTORE = TEST_DATA_MIXED_MODULESTORE
+    ENABLED_CACHES = ['default']
 
     def setUp(self):
         """
@@ -171,6 +222,7 @@ class TestCourseShiftGroup(ModuleStoreTestCase):
 @attr(shard=2)
 class TestCourseShiftGroupMembership(ModuleStoreTestCase):
     MODULESTORE = TEST_DATA_MIXED_MODULESTORE
+    ENABLED_CACHES = ['default']
 
     def setUp(self):
         """
@@ -327,6 +379,198 @@ class TestCourseShiftGroupMembership(ModuleStoreTestCase):
             str(membership.course_shift_group)
         ))
 
+    def test_get_user_membership_single_query(self):
+        """
+        Tests that membership stores course_key and is found
+        with its shift by the single query
+        """
+        membership = CourseShiftGroupMembership.transfer_user(self.user, None, self.group)
+        self.assertEqual(membership.course_key, self.course_key)
+        with self.assertNumQueries(1):
+            membership = CourseShiftGroupMembership.get_user_membership(self.user, self.course_key)
+            self.assertEqual(membership.course_shift_group.name, self.group.name)
+        self._delete_all_memberships()
+
+    def _member_counts(self, *groups):
+        return [CourseShiftGroup.objects.get(pk=x.pk).member_count for x in groups]
+
+    def test_member_count(self):
+        """
+        Tests that member_count follows single and bulk membership
+        changes and is fixed by reconciliation
+        """
+        group2, created = CourseShiftGroup.create("test_shift_group2", self.course_key, start_date=date_shifted(1))
+        user2 = UserFactory(username="test2", email="a2@b.com")
+        CourseShiftGroupMembership.transfer_user(self.user, None, self.group)
+        CourseShiftGroupMembership.transfer_user(user2, None, self.group)
+        self.assertEqual(self._member_counts(self.group, group2), [2, 0])
+
+        CourseShiftGroupMembership.transfer_user(self.user, self.group, group2)
+        self.assertEqual(self._member_counts(self.group, group2), [1, 1])
+
+        memberships = CourseShiftGroupMembership.objects.filter(course_shift_group=self.group)
+        CourseShiftGroupMembership.transfer_users(memberships, group2)
+        self.assertEqual(self._member_counts(self.group, group2), [0, 2])
+
+        CourseShiftGroupMembership.bulk_transfer_users([self.user.id, user2.id], self.course_key, self.group)
+        self.assertEqual(self._member_counts(self.group, group2), [2, 0])
+
+        CourseShiftGroupMembership.bulk_transfer_users([self.user.id], self.course_key, None)
+        self.assertEqual(self._member_counts(self.group, group2), [1, 0])
+
+        CourseShiftGroup.objects.filter(pk=group2.pk).update(member_count=10)
+        self.assertEqual(CourseShiftGroup.reconcile_member_counts(self.course_key), 1)
+        self.assertEqual(self._member_counts(self.group, group2), [1, 0])
+        self._delete_all_memberships()
+        group2.delete()
+
+    def test_bulk_transfer_keeps_course_cache(self):
+        """
+        Tests that bulk transfer updates cached shifts of the moved
+        users only and doesn't drop all cached data of the course
+        """
+        group2, created = CourseShiftGroup.create("test_shift_group2", self.course_key, start_date=date_shifted(1))
+        CourseShiftGroupMembership.transfer_user(self.user, None, self.group)
+        with patch('course_shifts.models.bump_course_cache_version') as bump_mock:
+            CourseShiftGroupMembership.bulk_transfer_users([self.user.id], self.course_key, group2)
+        self.assertFalse(bump_mock.called)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                CourseShiftGroupMembership.get_user_shift_data(self.user.id, self.course_key),
+                (group2.id, group2.days_shift)
+            )
+        self._delete_all_memberships()
+        group2.delete()
+
+    def test_bulk_transfer_concurrent_enrollment(self):
+        """
+        Tests that chunk failed by concurrent enrollment
+        is retried with fresh memberships
+        """
+        group2, created = CourseShiftGroup.create("test_shift_group2", self.course_key, start_date=date_shifted(1))
+        real_chunk = CourseShiftGroupMembership._bulk_transfer_chunk
+
+        def enroll_concurrently(user_ids, course_key, course_shift_group_to):
+            if not CourseShiftGroupMembership.objects.filter(user=self.user).exists():
+                CourseShiftGroupMembership.transfer_user(self.user, None, group2)
+                raise IntegrityError("Duplicate membership")
+            return real_chunk(user_ids, course_key, course_shift_group_to)
+
+        with patch.object(CourseShiftGroupMembership, '_bulk_transfer_chunk', side_effect=enroll_concurrently):
+            result = CourseShiftGroupMembership.bulk_transfer_users([self.user.id], self.course_key, self.group)
+        self.assertEqual(result["transferred"], 1)
+        membership = CourseShiftGroupMembership.get_user_membership(self.user, self.course_key)
+        self.assertEqual(membership.course_shift_group, self.group)
+        self.assertEqual(self._member_counts(self.group, group2), [1, 0])
+        self._delete_all_memberships()
+        group2.delete()
+
+    def test_user_shift_data_cache(self):
+        """
+        Tests that user's shift data is cached including absent shift,
+        and is updated at membership changes
+        """
+        get_data = CourseShiftGroupMembership.get_user_shift_data
+        group2, created = CourseShiftGroup.create("test_shift_group2", self.course_key, start_date=date_shifted(1))
+        self.assertIsNone(get_data(self.user.id, self.course_key))
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_data(self.user.id, self.course_key))
+
+        CourseShiftGroupMembership.transfer_user(self.user, None, self.group)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_data(self.user.id, self.course_key), (self.group.id, self.group.days_shift))
+
+        CourseShiftGroupMembership.transfer_user(self.user, self.group, group2)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_data(self.user.id, self.course_key), (group2.id, group2.days_shift))
+
+        group2.set_start_date(date_shifted(3))
+        self.assertEqual(get_data(self.user.id, self.course_key), (group2.id, group2.days_shift))
+
+        CourseShiftGroupMembership.bulk_transfer_users([self.user.id], self.course_key, self.group)
+        self.assertEqual(get_data(self.user.id, self.course_key), (self.group.id, self.group.days_shift))
+
+        CourseShiftGroupMembership.bulk_transfer_users([self.user.id], self.course_key, None)
+        self.assertIsNone(get_data(self.user.id, self.course_key))
+        group2.delete()
+
+    def test_user_shift_data_cache_race(self):
+        """
+        Tests that value read from the database before concurrent
+        membership change doesn't overwrite the value written by it
+        """
+        real_add = cache.add
+        # Course cache version is created before the user's shift is read
+        CourseShiftGroupMembership._user_shift_cache_key(self.user.id, self.course_key)
+
+        def add_after_enrollment(*args, **kwargs):
+            if not CourseShiftGroupMembership.objects.filter(user=self.user).exists():
+                CourseShiftGroupMembership.objects.create(user=self.user, course_shift_group=self.group)
+            return real_add(*args, **kwargs)
+
+        with patch('course_shifts.models.cache.add', side_effect=add_after_enrollment):
+            self.assertIsNone(CourseShiftGroupMembership.get_user_shift_data(self.user.id, self.course_key))
+        self.assertEqual(
+            CourseShiftGroupMembership.get_user_shift_data(self.user.id, self.course_key),
+            (self.group.id, self.group.days_shift)
+        )
+        self._delete_all_memberships()
+
+    def test_user_shift_data_cache_start_date_change(self):
+        """
+        Tests that shift data read by other process before the commit
+        of the start date change isn't kept in the cache
+        """
+        CourseShiftGroupMembership.transfer_user(self.user, None, self.group)
+        old_data = (self.group.id, self.group.days_shift)
+        with commit_callbacks_deferred():
+            with transaction.atomic():
+                self.group.set_start_date(self.group.start_date + datetime.timedelta(days=2))
+                # Other process reads the committed value at cache miss
+                cache_key = CourseShiftGroupMembership._user_shift_cache_key(self.user.id, self.course_key)
+                cache.set(cache_key, old_data)
+        self.assertEqual(
+            CourseShiftGroupMembership.get_user_shift_data(self.user.id, self.course_key),
+            (self.group.id, self.group.days_shift)
+        )
+        self.assertNotEqual(self.group.days_shift, old_data[1])
+        self._delete_all_memberships()
+
+    def test_user_shift_data_cache_failed_save(self):
+        """
+        Tests that membership which failed to be saved
+        isn't served from the cache
+        """
+        cache_key = CourseShiftGroupMembership._user_shift_cache_key(self.user.id, self.course_key)
+        with patch.object(CourseShiftGroupMembership, '_push_add_to_group', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                with transaction.atomic():
+                    CourseShiftGroupMembership.objects.create(user=self.user, course_shift_group=self.group)
+        self.assertIsNone(cache.get(cache_key))
+        self.assertIsNone(CourseShiftGroupMembership.get_user_shift_data(self.user.id, self.course_key))
+
+    def test_get_shifted_date_flat_for_shift_size(self):
+        """
+        Tests that shifted date lookup makes the same number of queries
+        regardless of the shift size, and none in trusted mode
+        """
+        date = datetime.datetime.now()
+        with self.assertRaises(ValueError):
+            self.group.get_shifted_date(self.user, date)
+
+        CourseShiftGroupMembership.transfer_user(self.user, None, self.group)
+        with self.assertNumQueries(1):
+            self.group.get_shifted_date(self.user, date)
+
+        for number in range(20):
+            other_user = UserFactory(username="bench_{}".format(number), email="bench_{}@b.com".format(number))
+            CourseShiftGroupMembership.transfer_user(other_user, None, self.group)
+        with self.assertNumQueries(1):
+            self.group.get_shifted_date(self.user, date)
+        with self.assertNumQueries(0):
+            self.group.get_shifted_date(self.user, date, check_membership=False)
+        self._delete_all_memberships()
+
 
 class EnrollClsFields(object):
     _ENROLL_BEFORE = 7
@@ -341,6 +585,7 @@ class TestCourseShiftSettings(ModuleStoreTestCase, EnrollClsFields):
     Test the course shifts settings
     """
     MODULESTORE = TEST_DATA_MIXED_MODULESTORE
+    ENABLED_CACHES = ['default']
 
     def setUp(self):
         """
@@ -368,6 +613,7 @@ class TestCourseShiftSettings(ModuleStoreTestCase, EnrollClsFields):
         settings.is_autostart = autostart
         settings.autostart_period_days = period
         settings.save()
+        update_course_shifts_autostart(self.course_key)
         settings = CourseShiftSettings.get_course_settings(self.course_key)
         self.assertTrue(settings.enroll_before_days == self._ENROLL_BEFORE)
         self.assertTrue(settings.enroll_after_days == self._ENROLL_AFTER)
@@ -416,6 +662,113 @@ class TestCourseShiftSettings(ModuleStoreTestCase, EnrollClsFields):
         self.assertTrue(settings.is_autostart == False)
         self.assertTrue(settings.autostart_period_days == self._PERIOD)
 
+    def test_settings_cache(self):
+        """
+        Tests that settings are cached, aren't created at reading
+        and cached value is dropped at saving
+        """
+        with self.assertNumQueries(1):
+            settings = CourseShiftSettings.get_course_settings(self.course_key)
+        with self.assertNumQueries(0):
+            CourseShiftSettings.get_course_settings(self.course_key)
+        self.assertIsNone(settings.pk)
+        self.assertFalse(CourseShiftSettings.objects.filter(course_key=self.course_key).exists())
+
+        CourseShiftSettings.get_or_create_course_settings(self.course_key)
+        settings.enroll_before_days = self._ENROLL_BEFORE
+        settings.save()
+        self.assertEqual(CourseShiftSettings.objects.filter(course_key=self.course_key).count(), 1)
+        settings = CourseShiftSettings.get_course_settings(self.course_key)
+        self.assertEqual(settings.enroll_before_days, self._ENROLL_BEFORE)
+
+    def test_settings_cache_dropped_after_commit(self):
+        """
+        Tests that settings read by other process before the commit
+        of the settings change aren't kept in the cache
+        """
+        self._settings_setup(autostart=False)
+        old_settings = CourseShiftSettings.get_course_settings(self.course_key)
+        with commit_callbacks_deferred():
+            with transaction.atomic():
+                settings = CourseShiftSettings.get_or_create_course_settings(self.course_key)
+                settings.is_shift_enabled = False
+                settings.save()
+                # Other process loads the committed settings at cache miss
+                cache_key = get_course_cache_key(CourseShiftSettings.SETTINGS_CACHE_KEY, self.course_key)
+                cache.set(cache_key, old_settings)
+                cache.set(CourseShiftSettings.ENABLED_COURSES_CACHE_KEY, frozenset([unicode(self.course_key)]))
+        self.assertFalse(CourseShiftSettings.get_course_settings(self.course_key).is_shift_enabled)
+        self.assertNotIn(unicode(self.course_key), CourseShiftSettings.get_enabled_course_keys())
+
+    def test_settings_concurrent_creation(self):
+        """
+        Tests that default settings are updated if settings
+        are created concurrently after the check
+        """
+        existing = CourseShiftSettings.objects.create(course_key=self.course_key)
+        settings = CourseShiftSettings(course_key=self.course_key, enroll_before_days=self._ENROLL_BEFORE)
+        with patch.object(CourseShiftSettings, '_get_saved_pk', side_effect=[None, existing.pk]):
+            settings.save()
+        self.assertEqual(settings.pk, existing.pk)
+        saved_settings = CourseShiftSettings.objects.get(course_key=self.course_key)
+        self.assertEqual(saved_settings.enroll_before_days, self._ENROLL_BEFORE)
+
+    def test_settings_get_or_create_race(self):
+        """
+        Tests that get_or_create_course_settings returns settings
+        created concurrently after its lookup
+        """
+        existing = CourseShiftSettings.objects.create(course_key=self.course_key)
+        real_get = QuerySet.get
+        calls = []
+
+        def get_after_race(queryset, *args, **kwargs):
+            if not calls:
+                calls.append(True)
+                raise CourseShiftSettings.DoesNotExist
+            return real_get(queryset, *args, **kwargs)
+
+        with patch.object(QuerySet, 'get', autospec=True, side_effect=get_after_race):
+            settings = CourseShiftSettings.get_or_create_course_settings(self.course_key)
+        self.assertEqual(settings.pk, existing.pk)
+        self.assertEqual(CourseShiftSettings.objects.filter(course_key=self.course_key).count(), 1)
+
+    def test_settings_create_existing(self):
+        """
+        Tests that explicit creation of existing settings fails
+        """
+        CourseShiftSettings.objects.create(course_key=self.course_key)
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                CourseShiftSettings.objects.create(course_key=self.course_key)
+        self.assertEqual(CourseShiftSettings.objects.filter(course_key=self.course_key).count(), 1)
+
+    def test_course_start_date_sync(self):
+        """
+        Tests that course start date is read without writes, is stored
+        in settings by sync and shifts keep their start dates when course start is moved
+        """
+        self._settings_setup(autostart=False)
+        settings = CourseShiftSettings.get_course_settings(self.course_key)
+        self.assertIsNone(settings.course_start)
+        with self.assertNumQueries(0):
+            self.assertEqual(settings.course_start_date, self.course.start.date())
+        self.assertIsNone(CourseShiftSettings.objects.get(course_key=self.course_key).course_start)
+
+        self.assertTrue(CourseShiftSettings.sync_course_start_date(self.course))
+        settings = CourseShiftSettings.get_course_settings(self.course_key)
+        self.assertEqual(settings.course_start, self.course.start.date())
+
+        group, created = CourseShiftGroup.create("test_shift_group", self.course_key, start_date=date_shifted(0))
+        days_shift = group.days_shift
+        self.course.start = self.course.start - datetime.timedelta(days=3)
+        self.assertTrue(CourseShiftSettings.sync_course_start_date(self.course))
+        self.assertFalse(CourseShiftSettings.sync_course_start_date(self.course))
+
+        settings = CourseShiftSettings.get_course_settings(self.course_key)
+        self.assertEqual(settings.course_start_date, self.course.start.date())
+        self.assertEqual(CourseShiftGroup.objects.get(pk=group.pk).days_shift, days_shift + 3)
+
     def test_autostart_generation_one(self):
         """
         Single start should be generated - default shift at start
@@ -454,6 +807,81 @@ class TestCourseShiftSettings(ModuleStoreTestCase, EnrollClsFields):
             shifts_number,
             str(course_shifts)))
 
+    def test_autostart_not_created_at_save(self):
+        """
+        Tests that settings saving doesn't create shifts,
+        they are created by the sweep only
+        """
+        settings = CourseShiftSettings.get_course_settings(self.course_key)
+        settings.is_shift_enabled = True
+        settings.is_autostart = True
+        settings.autostart_period_days = self._PERIOD
+        settings.save()
+        self._no_groups_check()
+
+        self.assertEqual(sweep_autostart_shifts(), 1)
+        course_shifts = CourseShiftGroup.get_course_shifts(self.course_key)
+        self.assertTrue(len(course_shifts) > 0)
+
+    def test_autostart_sweep_skips_broken_course(self):
+        """
+        Tests that error in one course doesn't stop the sweep
+        """
+        CourseShiftSettings.objects.create(
+            course_key=CourseKey.from_string("edX/missing/2012_Fall"),
+            is_shift_enabled=True,
+            is_autostart=True,
+        )
+        settings = CourseShiftSettings.get_course_settings(self.course_key)
+        settings.is_shift_enabled = True
+        settings.is_autostart = True
+        settings.autostart_period_days = self._PERIOD
+        settings.save()
+
+        self.assertEqual(sweep_autostart_shifts(), 1)
+        self.assertTrue(len(CourseShiftGroup.get_course_shifts(self.course_key)) > 0)
+
+    def test_autostart_generation_idempotent(self):
+        """
+        Tests that repeated autostart update doesn't create shifts
+        """
+        custom_period = 4
+        self._settings_setup(period=custom_period, autostart=True)
+        shifts_number = self._number_of_shifts(custom_period)
+        settings = CourseShiftSettings.get_course_settings(self.course_key)
+        self.assertEqual(settings.get_missing_autostart_dates(), [])
+        settings.update_shifts_autostart()
+        course_shifts = CourseShiftGroup.get_course_shifts(self.course_key)
+        self.assertEqual(len(course_shifts), shifts_number)
+        start_dates = sorted(x.start_date for x in course_shifts)
+        for previous, current in zip(start_dates, start_dates[1:]):
+            self.assertEqual((current - previous).days, custom_period)
+
+    def test_enabled_course_keys(self):
+        """
+        Tests that cached set of enabled courses follows settings changes
+        """
+        course_id = unicode(self.course_key)
+        self.assertNotIn(course_id, CourseShiftSettings.get_enabled_course_keys())
+        self._settings_setup(autostart=False)
+        self.assertIn(course_id, CourseShiftSettings.get_enabled_course_keys())
+
+        settings = CourseShiftSettings.get_course_settings(self.course_key)
+        settings.is_shift_enabled = False
+        settings.save()
+        self.assertNotIn(course_id, CourseShiftSettings.get_enabled_course_keys())
+
+    def test_provider_enabled_for(self):
+        """
+        Tests that override provider is enabled only for courses
+        with enabled shifts and when course isn't given
+        """
+        other_course = ToyCourseFactory.create(org="neworg")
+        self._settings_setup(autostart=False)
+        self.assertTrue(CourseShiftOverrideProvider.enabled_for(self.course))
+        self.assertFalse(CourseShiftOverrideProvider.enabled_for(other_course))
+        self.assertTrue(CourseShiftOverrideProvider.enabled_for(None))
+
     def test_turn_off_autostart(self):
         """
         Checks that when autostart is turned off
@@ -466,8 +894,69 @@ class TestCourseShiftSettings(ModuleStoreTestCase, EnrollClsFields):
         self._no_groups_check()
 
 
+@attr(shard=2)
+class TestCourseShiftsSync(ModuleStoreTestCase):
+    """
+    Tests synchronization of the shifts settings with the course
+    advanced settings at course publish and by management command
+    """
+    MODULESTORE = TEST_DATA_MIXED_MODULESTORE
+    ENABLED_CACHES = ['default']
+    ENABLED_SIGNALS = ['course_published']
+
+    def setUp(self):
+        super(TestCourseShiftsSync, self).setUp()
+        self.course = ToyCourseFactory.create(start=datetime.datetime.now())
+        self.course_key = self.course.id
+
+    def _enable_in_advanced_settings(self):
+        setattr(self.course, CourseShiftSettings.COURSE_ENABLE_FIELD_NAME, True)
+        self.course = self.store.update_item(self.course, ModuleStoreEnum.UserID.test)
+
+    def test_publish_enables_shifts(self):
+        """
+        Tests that shifts are enabled and course start is stored
+        when course is published with shifts turned on
+        """
+        self.assertFalse(CourseShiftManager(self.course_key).is_enabled)
+        self.assertFalse(CourseShiftSettings.objects.filter(course_key=self.course_key).exists())
+        self._enable_in_advanced_settings()
+        self.assertTrue(CourseShiftManager(self.course_key).is_enabled)
+        settings = CourseShiftSettings.objects.get(course_key=self.course_key)
+        self.assertTrue(settings.is_shift_enabled)
+        self.assertEqual(settings.course_start, self.course.start.date())
+
+    def test_sync_is_shift_enabled(self):
+        """
+        Tests that settings are created and enabled only for
+        courses with shifts turned on
+        """
+        self.assertFalse(CourseShiftSettings.sync_is_shift_enabled(self.course))
+        self.assertFalse(CourseShiftSettings.objects.filter(course_key=self.course_key).exists())
+        setattr(self.course, CourseShiftSettings.COURSE_ENABLE_FIELD_NAME, True)
+        self.assertTrue(CourseShiftSettings.sync_is_shift_enabled(self.course))
+        self.assertFalse(CourseShiftSettings.sync_is_shift_enabled(self.course))
+        self.assertTrue(CourseShiftSettings.get_course_settings(self.course_key).is_shift_enabled)
+
+    def test_sync_course_shifts_command(self):
+        """
+        Tests that command enables shifts and stores course start
+        for courses with shifts turned on
+        """
+        self._enable_in_advanced_settings()
+        CourseShiftSettings.objects.filter(course_key=self.course_key).delete()
+        other_course = ToyCourseFactory.create(org="neworg")
+        call_command('sync_course_shifts', course_ids=[unicode(self.course_key), unicode(other_course.id)])
+        settings = CourseShiftSettings.objects.get(course_key=self.course_key)
+        self.assertTrue(settings.is_shift_enabled)
+        self.assertEqual(settings.course_start, self.course.start.date())
+        self.assertFalse(CourseShiftSettings.objects.filter(course_key=other_course.id).exists())
+
+
 @attr(shard=2)
 class TestCourseShiftManager(ModuleStoreTestCase, EnrollClsFields):
+    ENABLED_CACHES = ['default']
+
     def setUp(self):
         super(TestCourseShiftManager, self).setUp()
         date = datetime.datetime.now() - datetime.timedelta(days=14)
@@ -537,6 +1026,23 @@ class TestCourseShiftManager(ModuleStoreTestCase, EnrollClsFields):
         self._delete_groups()
         self._no_groups_check()
 
+    def test_is_enabled_read_only(self):
+        """
+        Tests that is_enabled doesn't make queries and
+        doesn't change settings
+        """
+        shift_manager = CourseShiftManager(self.course_key)
+        with self.assertNumQueries(0):
+            self.assertTrue(shift_manager.is_enabled)
+
+        self.shift_settings.is_shift_enabled = False
+        self.shift_settings.save()
+        shift_manager = CourseShiftManager(self.course_key)
+        with self.assertNumQueries(0):
+            self.assertFalse(shift_manager.is_enabled)
+        self.shift_settings.is_shift_enabled = True
+        self.shift_settings.save()
+
     def test_get_user_course_shift_disabled(self):
         self._settings_setup()
         user = self.user
@@ -570,6 +1076,118 @@ class TestCourseShiftManager(ModuleStoreTestCase, EnrollClsFields):
             str(course_shifts)
         ))
 
+    def test_get_active_shifts_single_query(self):
+        """
+        Tests that active shifts are filtered by the single query
+        and agree with is_enrollable_now
+        """
+        self._settings_setup()
+        shift_manager = CourseShiftManager(self.course_key)
+        for days in range(-40, 20, 5):
+            shift_manager.create_shift(date_shifted(days))
+        with self.assertNumQueries(1):
+            active_shifts = list(shift_manager.get_active_shifts())
+        self.assertEqual(len(active_shifts), 2)
+        expected = [x for x in shift_manager.get_all_shifts() if x.is_enrollable_now(shift_manager.settings)]
+        self.assertEqual(set(active_shifts), set(expected))
+        self._delete_groups()
+
+    def test_active_shifts_cached(self):
+        """
+        Tests that active shifts are cached and
+        cache is invalidated at shift creation
+        """
+        self._settings_setup()
+        shift_manager = CourseShiftManager(self.course_key)
+        group = shift_manager.create_shift()
+        self.assertEqual(list(shift_manager.get_active_shifts()), [group])
+        with self.assertNumQueries(0):
+            self.assertEqual(list(shift_manager.get_active_shifts()), [group])
+
+        group2 = shift_manager.create_shift(date_shifted(3))
+        self.assertEqual(set(shift_manager.get_active_shifts()), set([group, group2]))
+        self._delete_groups()
+
+    def test_shifts_serialization_queries(self):
+        """
+        Tests that shifts list is serialized with the constant
+        number of queries
+        """
+        self._settings_setup()
+        shift_manager = CourseShiftManager(self.course_key)
+        for days in range(-10, 5):
+            shift_manager.create_shift(date_shifted(days))
+        with self.assertNumQueries(1):
+            data = CourseShiftSerializer(shift_manager.get_all_shifts(), many=True).data
+        self.assertEqual(len(data), 15)
+        with self.assertNumQueries(1):
+            data = CourseShiftSerializer(shift_manager.get_active_shifts(), many=True).data
+        self.assertEqual(len(data), 5)
+        with self.assertNumQueries(1):
+            shift = shift_manager.get_shift(data[0]["name"])
+            self.assertEqual(CourseShiftSerializer(shift).data["name"], data[0]["name"])
+        self._delete_groups()
+
+    def test_get_summary(self):
+        """
+        Tests summary content and that it's built by the fixed number of queries
+        """
+        self._settings_setup()
+        shift_manager = CourseShiftManager(self.course_key)
+        for days in range(-10, 5):
+            shift_manager.create_shift(date_shifted(days))
+        shift_manager.enroll_user(self.user, shift_manager.get_all_shifts()[0])
+
+        with self.assertNumQueries(1):
+            summary = shift_manager.get_summary()
+        self.assertEqual(len(summary["shifts"]), 15)
+        self.assertIsNone(summary["next_autostart_date"])
+        self.assertEqual(summary["settings"]["enroll_before_days"], self._ENROLL_BEFORE)
+        last_shift = summary["shifts"][0]
+        self.assertEqual(last_shift["start_date"], str(date_shifted(4)))
+        self.assertEqual(last_shift["member_count"], 1)
+        self.assertEqual(last_shift["enroll_start"], str(date_shifted(4 - self._ENROLL_BEFORE)))
+        with self.assertNumQueries(0):
+            self.assertEqual(shift_manager.get_summary(), summary)
+        self._delete_groups()
+
+    def test_summary_view(self):
+        """
+        Tests that summary view returns manager's summary
+        and is rejected for course without shifts
+        """
+        self._settings_setup()
+        shift_manager = CourseShiftManager(self.course_key)
+        shift_manager.create_shift(date_shifted(1))
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, user=UserFactory(is_staff=True))
+        resp = CourseShiftSummaryView.as_view()(request, course_id=unicode(self.course_key))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data, shift_manager.get_summary())
+        self.assertEqual(len(resp.data["shifts"]), 1)
+
+        other_course = ToyCourseFactory.create(org="neworg")
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, user=UserFactory(is_staff=True))
+        resp = CourseShiftSummaryView.as_view()(request, course_id=unicode(other_course.id))
+        self.assertEqual(resp.status_code, 406)
+        self._delete_groups()
+
+    def test_section_data(self):
+        """
+        Tests instructor dashboard section data built from the summary
+        """
+        self._settings_setup()
+        shift_manager = CourseShiftManager(self.course_key)
+        shift_manager.create_shift(date_shifted(1))
+        section_data = _section_course_shifts(self.course, {'staff': True})
+        summary = shift_manager.get_summary()
+        self.assertEqual(section_data['shifts_summary'], summary)
+        self.assertEqual(section_data['current_settings']['course_key'], unicode(self.course_key))
+        self.assertEqual(section_data['current_settings']['enroll_before_days'], self._ENROLL_BEFORE)
+        self.assertEqual(_section_course_shifts(ToyCourseFactory.create(org="neworg"), {'staff': True}), {})
+        self._delete_groups()
+
     def test_create_shift(self):
         """
         Tests manager.create_shift
@@ -687,6 +1305,7 @@ class TestCourseShiftManager(ModuleStoreTestCase, EnrollClsFields):
 
         CourseShiftGroupMembership.transfer_user(self.user, None, group2)
         active_user_groups = shift_manager.get_active_shifts(self.user)
+        self.assertIsInstance(active_user_groups, list)
         correct = len(active_user_groups) == 1 and group in active_user_groups
         self.assertTrue(correct, "Active user groups: {}".format(
             str(active_user_groups)
@@ -821,6 +1440,343 @@ class TestCourseShiftManager(ModuleStoreTestCase, EnrollClsFields):
             )
         )
 
+    def test_bulk_enroll(self):
+        """
+        Tests bulk enrollment, transfer and unenrollment
+        """
+        shift_manager = CourseShiftManager(self.course_key)
+        group1 = shift_manager.create_shift()
+        group2 = shift_manager.create_shift(date_shifted(-5))
+        users = [UserFactory(username="bulk_{}".format(x), email="bulk_{}@b.com".format(x)) for x in range(5)]
+        shift_manager.enroll_user(users[0], group2)
+
+        result = shift_manager.bulk_enroll(users, group1)
+        self.assertEqual(result, {"enrolled": 4, "transferred": 1, "unenrolled": 0, "unchanged": 0})
+        for user in users:
+            self.assertEqual(shift_manager.get_user_shift(user), group1)
+        self.assertEqual(group1.users.count(), 5)
+        self.assertEqual(group2.users.count(), 0)
+
+        result = shift_manager.bulk_enroll(users[:2], None)
+        self.assertEqual(result, {"enrolled": 0, "transferred": 0, "unenrolled": 2, "unchanged": 0})
+        self.assertIsNone(shift_manager.get_user_shift(users[0]))
+        self.assertEqual(group1.users.count(), 3)
+        self._delete_groups()
+
+    def test_merge_shifts(self):
+        """
+        Tests that all users are moved from one shift to another
+        """
+        shift_manager = CourseShiftManager(self.course_key)
+        group_from = shift_manager.create_shift()
+        group_to = shift_manager.create_shift(date_shifted(-5))
+        users = [UserFactory(username="merge_{}".format(x), email="merge_{}@b.com".format(x)) for x in range(3)]
+        shift_manager.bulk_enroll(users, group_from)
+
+        moved_count = shift_manager.merge_shifts(group_from, group_to)
+        self.assertEqual(moved_count, 3)
+        self.assertEqual(group_from.users.count(), 0)
+        self.assertEqual(group_to.users.count(), 3)
+        for user in users:
+            self.assertEqual(shift_manager.get_user_shift(user), group_to)
+        self.assertEqual(shift_manager.merge_shifts(group_from, group_to), 0)
+        self._delete_groups()
+
+    def test_iter_roster(self):
+        """
+        Tests that roster contains all shift members, also
+        when it is read by several chunks
+        """
+        shift_manager = CourseShiftManager(self.course_key)
+        group1 = shift_manager.create_shift()
+        group2 = shift_manager.create_shift(date_shifted(-5))
+        users = [UserFactory(username="roster_{}".format(x), email="roster_{}@b.com".format(x)) for x in range(5)]
+        shift_manager.bulk_enroll(users[:3], group1)
+        shift_manager.bulk_enroll(users[3:], group2)
+
+        roster = list(shift_manager.iter_roster(chunk_size=2))
+        self.assertEqual(len(roster), 5)
+        expected = set(
+            [(x.username, x.email, group1.name, group1.start_date, group1.days_shift) for x in users[:3]] +
+            [(x.username, x.email, group2.name, group2.start_date, group2.days_shift) for x in users[3:]]
+        )
+        self.assertEqual(set(roster), expected)
+        self._delete_groups()
+
+    def _export_roster(self, **params):
+        request = APIRequestFactory().get('/', params)
+        force_authenticate(request, user=UserFactory(is_staff=True))
+        return CourseShiftRosterExportView.as_view()(request, course_id=unicode(self.course_key))
+
+    def test_roster_export_view(self):
+        """
+        Tests that roster is streamed as UTF-8 CSV with header
+        or as JSON lines, and unknown format is rejected
+        """
+        shift_manager = CourseShiftManager(self.course_key)
+        group = shift_manager.create_shift(name=u"shift_\u0441\u043c\u0435\u043d\u0430")
+        shift_manager.enroll_user(self.user, group, forced=True)
+
+        resp = self._export_roster()
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Content-Type"], "text/csv")
+        self.assertIn("attachment;", resp["Content-Disposition"])
+        rows = list(csv.reader("".join(resp.streaming_content).splitlines()))
+        self.assertEqual(rows[0], list(CourseShiftRosterExportView.FIELDS))
+        self.assertEqual(rows[1:], [[
+            self.user.username,
+            self.user.email,
+            group.name.encode('utf-8'),
+            str(group.start_date),
+            str(group.days_shift),
+        ]])
+
+        resp = self._export_roster(export_format="jsonl")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Content-Type"], "application/x-ndjson")
+        lines = "".join(resp.streaming_content).splitlines()
+        self.assertEqual([json.loads(x) for x in lines], [{
+            "username": self.user.username,
+            "email": self.user.email,
+            "shift_name": group.name,
+            "start_date": str(group.start_date),
+            "days_shift": group.days_shift,
+        }])
+
+        resp = self._export_roster(export_format="xml")
+        self.assertEqual(resp.status_code, 400)
+        self._delete_groups()
+
+    def test_get_users_shifts(self):
+        """
+        Tests batch lookup of users shifts
+        """
+        shift_manager = CourseShiftManager(self.course_key)
+        group1 = shift_manager.create_shift()
+        group2 = shift_manager.create_shift(date_shifted(-5))
+        users = [UserFactory(username="batch_{}".format(x), email="batch_{}@b.com".format(x)) for x in range(4)]
+        shift_manager.bulk_enroll(users[:2], group1)
+        shift_manager.bulk_enroll(users[2:3], group2)
+
+        with self.assertNumQueries(2):
+            users_shifts = shift_manager.get_users_shifts(users)
+        self.assertEqual(users_shifts, {users[0].id: group1, users[1].id: group1, users[2].id: group2})
+        self.assertEqual(shift_manager.get_users_shifts([users[3].id]), {})
+        self._delete_groups()
+
+    def _upload_csv(self, content):
+        staff = UserFactory(is_staff=True)
+        request = APIRequestFactory().post(
+            '/',
+            {"file": SimpleUploadedFile("shifts.csv", content)},
+            format='multipart'
+        )
+        force_authenticate(request, user=staff)
+        return CourseShiftUserUploadView.as_view()(request, course_id=unicode(self.course_key))
+
+    def test_upload_csv_report(self):
+        """
+        Tests that CSV upload skips header with BOM and reports
+        result of every row, including not UTF-8 rows
+        """
+        shift_manager = CourseShiftManager(self.course_key)
+        group = shift_manager.create_shift()
+        content = "\n".join([
+            u"\ufeffusername,shift_name".encode('utf-8'),
+            "test,{}".format(group.name),
+            "\xff\xfe,{}".format(group.name),
+            "unknown,{}".format(group.name),
+            "test,unknown",
+        ])
+        resp = self._upload_csv(content)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["success_count"], 1)
+        self.assertEqual(resp.data["error_count"], 3)
+        self.assertEqual([x["row"] for x in resp.data["rows"]], [2, 3, 4, 5])
+        self.assertEqual(resp.data["rows"][0]["status"], "success")
+        self.assertEqual(resp.data["rows"][1]["error"], "Row is not UTF-8 encoded")
+        self.assertEqual(shift_manager.get_user_shift(self.user), group)
+        self._delete_groups()
+
+    def test_upload_csv_overridden_rows(self):
+        """
+        Tests that only the last row of the user is applied
+        and earlier ones are reported as overridden, also between chunks
+        """
+        shift_manager = CourseShiftManager(self.course_key)
+        group1 = shift_manager.create_shift()
+        group2 = shift_manager.create_shift(date_shifted(-5))
+        content = "\n".join([
+            "test,{}".format(group1.name),
+            "test,{}".format(group2.name),
+            "test,{}".format(group1.name),
+        ])
+        with patch.object(CourseShiftGroupMembership, 'BULK_CHUNK_SIZE', 2):
+            resp = self._upload_csv(content)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["success_count"], 1)
+        self.assertEqual(resp.data["overridden_count"], 2)
+        self.assertEqual([x["status"] for x in resp.data["rows"]], ["overridden", "overridden", "success"])
+        self.assertEqual([x.get("overridden_by") for x in resp.data["rows"]], [2, 3, None])
+        self.assertEqual(shift_manager.get_user_shift(self.user), group1)
+        self._delete_groups()
+
+    def test_upload_csv_enroll_error(self):
+        """
+        Tests that failed enrollment is reported for the rows
+        instead of the server error
+        """
+        shift_manager = CourseShiftManager(self.course_key)
+        group = shift_manager.create_shift()
+        with patch('course_shifts.api.CourseShiftManager.bulk_enroll', side_effect=IntegrityError("conflict")):
+            resp = self._upload_csv("test,{}".format(group.name))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["error_count"], 1)
+        self.assertEqual(resp.data["rows"][0]["status"], "error")
+        self.assertIsNone(shift_manager.get_user_shift(self.user))
+        self._delete_groups()
+
+    def test_users_batch_view_comma_separated(self):
+        """
+        Tests that usernames can be given as comma-separated string
+        """
+        shift_manager = CourseShiftManager(self.course_key)
+        group = shift_manager.create_shift()
+        shift_manager.enroll_user(self.user, group, forced=True)
+        user2 = UserFactory(username="test2", email="a2@b.com")
+        request = APIRequestFactory().post('/', {"usernames": "test, test2"}, format='json')
+        force_authenticate(request, user=UserFactory(is_staff=True))
+        resp = CourseShiftUsersBatchView.as_view()(request, course_id=unicode(self.course_key))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["shifts"], {"test": group.name, user2.username: None})
+        self._delete_groups()
+
+    def test_get_user_days_shift(self):
+        """
+        Tests that user's days_shift is got from the cache
+        and is absent for disabled shifts
+        """
+        shift_manager = CourseShiftManager(self.course_key)
+        group = shift_manager.create_shift(start_date=date_shifted(2))
+        self.assertIsNone(shift_manager.get_user_days_shift(self.user))
+        shift_manager.enroll_user(self.user, group, forced=True)
+        with self.assertNumQueries(0):
+            self.assertEqual(shift_manager.get_user_days_shift(self.user), group.days_shift)
+
+        shift_manager.settings.is_shift_enabled = False
+        self.assertIsNone(shift_manager.get_user_days_shift(self.user))
+        self._delete_groups()
+
+    def test_transformer(self):
+        """
+        Tests that transformer shifts start and due dates of the blocks
+        and merged start dates used by StartDateTransformer
+        """
+        shift_manager = CourseShiftManager(self.course_key)
+        group = shift_manager.create_shift(start_date=date_shifted(2))
+        shift_manager.enroll_user(self.user, group, forced=True)
+        delta = datetime.timedelta(days=group.days_shift)
+
+        block_structure = BlockStructureFactory.create_from_modulestore(self.course.location, self.store)
+        StartDateTransformer.collect(block_structure)
+        CourseShiftTransformer.collect(block_structure)
+        block_structure._collect_requested_xblock_fields()  # pylint: disable=protected-access
+        chapter_keys = [x for x in block_structure.topological_traversal() if x.block_type == 'chapter']
+        self.assertTrue(chapter_keys)
+        base_starts = dict((x, block_structure.get_xblock_field(x, 'start')) for x in chapter_keys)
+        course_start = block_structure.get_xblock_field(self.course.location, 'start')
+
+        CourseShiftTransformer().transform(CourseUsageInfo(self.course_key, self.user), block_structure)
+        self.assertEqual(block_structure.get_xblock_field(self.course.location, 'start'), course_start)
+        for chapter_key in chapter_keys:
+            shifted_start = base_starts[chapter_key] + delta
+            self.assertEqual(block_structure.get_xblock_field(chapter_key, 'start'), shifted_start)
+            merged_start = block_structure.get_transformer_block_field(
+                chapter_key, StartDateTransformer, StartDateTransformer.MERGED_START_DATE
+            )
+            self.assertEqual(merged_start, max(course_start, shifted_start))
+        self._delete_groups()
+
+    def test_provider_get(self):
+        """
+        Tests that provider shifts due and start dates of all chapters and
+        sequentials, and user's shift and schedule are resolved once per request
+        """
+        due = datetime.datetime(2030, 1, 10, 12, tzinfo=UTC)
+        start = datetime.datetime(2030, 1, 5, 12, tzinfo=UTC)
+        chapter = ItemFactory.create(parent_location=self.course.location, category='chapter', start=start, due=due)
+        ItemFactory.create(parent_location=chapter.location, category='sequential', start=start, due=due)
+        invalidate_course_schedule(self.course_key)
+        shift_manager = CourseShiftManager(self.course_key)
+        group = shift_manager.create_shift(start_date=date_shifted(2))
+        shift_manager.enroll_user(self.user, group, forced=True)
+        delta = datetime.timedelta(days=group.days_shift)
+
+        blocks = []
+        for category in ('chapter', 'sequential'):
+            blocks.extend(self.store.get_items(self.course_key, qualifiers={'category': category}))
+        schedule = get_course_schedule(self.course_key)
+        default = object()
+        provider = CourseShiftOverrideProvider(self.user)
+        shifted_count = 0
+        for block in blocks:
+            for name in ('due', 'start'):
+                schedule_key = (unicode(block.location), name)
+                if schedule_key in schedule:
+                    base_value = schedule[schedule_key]
+                else:
+                    base_value = get_default_fallback_field_value(block, name)
+                expected = base_value + delta if base_value else default
+                self.assertEqual(provider.get(block, name, default), expected)
+                shifted_count += expected is not default
+        self.assertGreaterEqual(shifted_count, 4)
+
+        RequestCache.clear_request_cache()
+        with CaptureQueriesContext(connection) as single_block_queries:
+            provider.get(blocks[0], 'due', default)
+        RequestCache.clear_request_cache()
+        with CaptureQueriesContext(connection) as all_blocks_queries:
+            for block in blocks:
+                provider.get(block, 'due', default)
+                provider.get(block, 'start', default)
+        self.assertEqual(len(all_blocks_queries), len(single_block_queries))
+        self._delete_groups()
+
+    def test_get_user_courses_shifts(self):
+        """
+        Tests that shifts data for many courses is got by the fixed
+        number of queries
+        """
+        shift_manager = CourseShiftManager(self.course_key)
+        group = shift_manager.create_shift()
+        shift_manager.enroll_user(self.user, group)
+        other_course = ToyCourseFactory.create(org="neworg")
+
+        with self.assertNumQueries(2):
+            courses_data = CourseShiftManager.get_user_courses_shifts(
+                self.user,
+                [self.course_key, other_course.id]
+            )
+            self.assertEqual(courses_data[self.course_key]["shift"].name, group.name)
+        self.assertTrue(courses_data[self.course_key]["is_enabled"])
+        self.assertFalse(courses_data[other_course.id]["is_enabled"])
+        self.assertIsNone(courses_data[other_course.id]["shift"])
+        self.assertFalse(CourseShiftSettings.objects.filter(course_key=other_course.id).exists())
+        self._delete_groups()
+
+    def test_bulk_enroll_inactive_error(self):
+        """
+        Tests that bulk enrollment on inactive shift is possible only in forced mode
+        """
+        shift_manager = CourseShiftManager(self.course_key)
+        group = shift_manager.create_shift(date_shifted(-20))
+        with self.assertRaises(ValueError):
+            shift_manager.bulk_enroll([self.user], group)
+        result = shift_manager.bulk_enroll([self.user], group, forced=True)
+        self.assertEqual(result["enrolled"], 1)
+        self.assertEqual(shift_manager.get_user_shift(self.user), group)
+        self._delete_groups()
+
     def test_unenroll_user(self):
         """
         Tests that enroll with None leads to unenrollment
@@ -840,3 +1796,231 @@ class TestCourseShiftManager(ModuleStoreTestCase, EnrollClsFields):
             current_shift is None,
             "Current shift should be None, but it is {}".format(str(current_shift))
         )
+
+
+@attr(shard=2)
+class TestCourseShiftSchedule(ModuleStoreTestCase):
+    """
+    Tests precomputed course schedule
+    """
+    MODULESTORE = TEST_DATA_MIXED_MODULESTORE
+    ENABLED_CACHES = ['default']
+
+    def setUp(self):
+        super(TestCourseShiftSchedule, self).setUp()
+        date = datetime.datetime.now()
+        self.course = ToyCourseFactory.create(start=date)
+        self.course_key = self.course.id
+        invalidate_course_schedule(self.course_key)
+
+    def _create_chapters(self):
+        """
+        Creates chapters with due dates: visible, visible to staff only
+        and orphaned one. Returns their locations
+        """
+        due = datetime.datetime(2030, 1, 10, 12, tzinfo=UTC)
+        visible = ItemFactory.create(parent_location=self.course.location, category='chapter', due=due)
+        staff_only = ItemFactory.create(
+            parent_location=self.course.location, category='chapter', due=due, visible_to_staff_only=True
+        )
+        orphan = self.store.create_item(ModuleStoreEnum.UserID.test, self.course_key, 'chapter', fields={'due': due})
+        invalidate_course_schedule(self.course_key)
+        return visible.location, staff_only.location, orphan.location
+
+    def test_schedule_skips_hidden_blocks(self):
+        """
+        Tests that schedule doesn't contain orphans and blocks hidden from learners
+        """
+        visible, staff_only, orphan = self._create_chapters()
+        schedule = get_course_schedule(self.course_key)
+        self.assertIn((unicode(visible), 'due'), schedule)
+        self.assertNotIn((unicode(staff_only), 'due'), schedule)
+        self.assertNotIn((unicode(orphan), 'due'), schedule)
+
+    def test_user_deadlines_view(self):
+        """
+        Tests that deadlines are returned to the enrolled learner only,
+        shifted and without hidden blocks
+        """
+        visible, staff_only, orphan = self._create_chapters()
+        shift_settings = CourseShiftSettings.get_or_create_course_settings(self.course_key)
+        shift_settings.is_shift_enabled = True
+        shift_settings.is_autostart = False
+        shift_settings.save()
+        user = UserFactory(username="test", email="a@b.com")
+        shift_manager = CourseShiftManager(self.course_key)
+        group = shift_manager.create_shift(start_date=date_shifted(5))
+        shift_manager.enroll_user(user, group, forced=True)
+
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, user=user)
+        resp = CourseShiftUserDeadlinesView.as_view()(request, course_id=unicode(self.course_key))
+        self.assertEqual(resp.status_code, 403)
+
+        CourseEnrollment.enroll(user, self.course_key)
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, user=user)
+        resp = CourseShiftUserDeadlinesView.as_view()(request, course_id=unicode(self.course_key))
+        self.assertEqual(resp.status_code, 200)
+        deadlines = resp.data["deadlines"]
+        self.assertEqual(deadlines, shift_manager.get_user_deadlines(user))
+        self.assertIn({
+            "location": unicode(visible),
+            "field": "due",
+            "date": datetime.datetime(2030, 1, 10, 12, tzinfo=UTC) + datetime.timedelta(days=group.days_shift),
+        }, deadlines)
+        locations = set(x["location"] for x in deadlines)
+        self.assertNotIn(unicode(staff_only), locations)
+        self.assertNotIn(unicode(orphan), locations)
+        group.delete()
+
+    def test_schedule_contains_shifted_blocks(self):
+        """
+        Tests that schedule contains course and chapters fields only
+        """
+        schedule = get_course_schedule(self.course_key)
+        self.assertIn((unicode(self.course.location), 'due'), schedule)
+        self.assertNotIn((unicode(self.course.location), 'start'), schedule)
+        for chapter in self.store.get_items(self.course_key, qualifiers={'category': 'chapter'}):
+            self.assertIn((unicode(chapter.location), 'start'), schedule)
+            self.assertIn((unicode(chapter.location), 'due'), schedule)
+
+    def test_shifted_schedule(self):
+        """
+        Tests that all set values are shifted and empty ones are kept
+        """
+        schedule = get_course_schedule(self.course_key)
+        shifted = get_shifted_schedule(schedule, 10)
+        self.assertEqual(set(schedule.keys()), set(shifted.keys()))
+        for key, value in schedule.iteritems():
+            if value:
+                self.assertEqual(shifted[key], value + datetime.timedelta(days=10))
+            else:
+                self.assertEqual(shifted[key], value)
+
+    def test_schedule_cached(self):
+        """
+        Tests that schedule is built once and rebuilt after invalidation
+        """
+        get_course_schedule(self.course_key)
+        with patch('course_shifts.schedule.build_course_schedule') as build_mock:
+            get_course_schedule(self.course_key)
+            self.assertFalse(build_mock.called)
+            invalidate_course_schedule(self.course_key)
+            build_mock.return_value = {}
+            get_course_schedule(self.course_key)
+            self.assertTrue(build_mock.called)
+
+    def test_user_deadlines(self):
+        """
+        Tests that user's deadlines are shifted and cached
+        """
+        shift_settings = CourseShiftSettings.get_or_create_course_settings(self.course_key)
+        shift_settings.is_shift_enabled = True
+        shift_settings.is_autostart = False
+        shift_settings.save()
+        user = UserFactory(username="test", email="a@b.com")
+        shift_manager = CourseShiftManager(self.course_key)
+        group = shift_manager.create_shift(start_date=date_shifted(5))
+        shift_manager.enroll_user(user, group, forced=True)
+
+        deadlines = shift_manager.get_user_deadlines(user)
+        shifted = get_shifted_schedule(get_course_schedule(self.course_key), group.days_shift)
+        self.assertEqual(
+            set((x["location"], x["field"], x["date"]) for x in deadlines),
+            set((key[0], key[1], value) for key, value in shifted.iteritems() if value)
+        )
+        self.assertEqual(deadlines, sorted(deadlines, key=lambda x: x["date"]))
+        with patch('course_shifts.manager.get_course_schedule') as schedule_mock:
+            self.assertEqual(shift_manager.get_user_deadlines(user), deadlines)
+            self.assertFalse(schedule_mock.called)
+        group.delete()
+
+    def test_deadline_reminders(self):
+        """
+        Tests that shift members are grouped by shifted due dates
+        and are yielded by chunks
+        """
+        shift_settings = CourseShiftSettings.get_or_create_course_settings(self.course_key)
+        shift_settings.is_shift_enabled = True
+        shift_settings.is_autostart = False
+        shift_settings.save()
+        shift_manager = CourseShiftManager(self.course_key)
+        group1 = shift_manager.create_shift(start_date=date_shifted(0))
+        group2 = shift_manager.create_shift(start_date=date_shifted(3))
+        users = [UserFactory(username="test_{}".format(x), email="a{}@b.com".format(x)) for x in range(3)]
+        shift_manager.enroll_user(users[0], group1, forced=True)
+        shift_manager.enroll_user(users[1], group1, forced=True)
+        shift_manager.enroll_user(users[2], group2, forced=True)
+
+        schedule = {
+            ("block1", "due"): datetime.datetime(2030, 1, 10, 12),
+            ("block2", "due"): datetime.datetime(2030, 1, 12, 12),
+            ("block2", "start"): datetime.datetime(2030, 1, 11, 12),
+        }
+        with patch('course_shifts.manager.get_course_schedule', return_value=schedule):
+            reminders = list(shift_manager.iter_deadline_reminders(
+                datetime.date(2030, 1, 11) + datetime.timedelta(days=group1.days_shift),
+                datetime.date(2030, 1, 10) + datetime.timedelta(days=group2.days_shift),
+                chunk_size=1
+            ))
+        group1_deadlines = [(datetime.date(2030, 1, 12) + datetime.timedelta(days=group1.days_shift), ["block2"])]
+        group2_deadlines = [(datetime.date(2030, 1, 10) + datetime.timedelta(days=group2.days_shift), ["block1"])]
+        self.assertEqual(reminders, [
+            (group1_deadlines, [users[0].id]),
+            (group1_deadlines, [users[1].id]),
+            (group2_deadlines, [users[2].id]),
+        ])
+        group1.delete()
+        group2.delete()
+
+    def test_deadline_reminders_skip_hidden_blocks(self):
+        """
+        Tests that reminders aren't sent for orphans and blocks hidden from learners
+        """
+        visible, staff_only, orphan = self._create_chapters()
+        shift_settings = CourseShiftSettings.get_or_create_course_settings(self.course_key)
+        shift_settings.is_shift_enabled = True
+        shift_settings.is_autostart = False
+        shift_settings.save()
+        shift_manager = CourseShiftManager(self.course_key)
+        group = shift_manager.create_shift(start_date=date_shifted(0))
+        user = UserFactory(username="test_hidden", email="hidden@b.com")
+        shift_manager.enroll_user(user, group, forced=True)
+        due_date = datetime.date(2030, 1, 10) + datetime.timedelta(days=group.days_shift)
+        reminders = list(shift_manager.iter_deadline_reminders(due_date, due_date))
+        self.assertEqual(len(reminders), 1)
+        deadlines, user_ids = reminders[0]
+        self.assertEqual(user_ids, [user.id])
+        self.assertEqual(deadlines[0][0], due_date)
+        self.assertIn(unicode(visible), deadlines[0][1])
+        self.assertNotIn(unicode(staff_only), deadlines[0][1])
+        self.assertNotIn(unicode(orphan), deadlines[0][1])
+        group.delete()
+
+    def test_deadline_reminders_roster_read_once(self):
+        """
+        Tests that members are read once for all dates of the range
+        """
+        shift_settings = CourseShiftSettings.get_or_create_course_settings(self.course_key)
+        shift_settings.is_shift_enabled = True
+        shift_settings.is_autostart = False
+        shift_settings.save()
+        shift_manager = CourseShiftManager(self.course_key)
+        group = shift_manager.create_shift(start_date=date_shifted(0))
+        user = UserFactory(username="test_reminder", email="reminder@b.com")
+        shift_manager.enroll_user(user, group, forced=True)
+        schedule = dict(
+            (("block{}".format(x), "due"), datetime.datetime(2030, 1, 1 + x, 12)) for x in range(10)
+        )
+        date_from = datetime.date(2030, 1, 1) + datetime.timedelta(days=group.days_shift)
+        with patch('course_shifts.manager.get_course_schedule', return_value=schedule):
+            # shifts, first chunk and empty chunk
+            with self.assertNumQueries(3):
+                reminders = list(shift_manager.iter_deadline_reminders(
+                    date_from,
+                    date_from + datetime.timedelta(days=30)
+                ))
+        self.assertEqual(len(reminders), 1)
+        self.assertEqual(len(reminders[0][0]), 10)
+        group.delete()
@@ -0,0 +1,89 @@
+"""
+Block structure transformer for course shifts. It applies the user's shift
+to the blocks got by the course blocks api (used by the mobile api and
+the dates), where field override providers are not used.
+"""
+from datetime import timedelta
+
+from lms.djangoapps.course_blocks.transformers.start_date import StartDateTransformer
+from lms.djangoapps.course_blocks.transformers.utils import get_field_on_block
+from openedx.core.lib.block_structure.transformer import BlockStructureTransformer, FilteringTransformerMixin
+from xmodule.course_metadata_utils import DEFAULT_START_DATE
+
+from .manager import CourseShiftManager
+from .schedule import COURSE_SHIFTED_FIELDS, BLOCK_SHIFTED_FIELDS, get_shifted_fields
+
+
+class CourseShiftTransformer(FilteringTransformerMixin, BlockStructureTransformer):
+    """
+    Shifts due and start dates of the blocks according to the user's
+    membership in CourseShiftGroups. Fields and categories are the same
+    as for CourseShiftOverrideProvider.
+
+    StartDateTransformer checks access with its own collected merged start
+    dates, so they are recalculated with shifted start dates too. Filtering
+    transformers are applied before the others, and start date filter reads
+    merged dates only at filtering, so blocks visibility is the same as in
+    courseware.
+
+    Base values are collected once per course, and user's shift is got
+    from the cache, so transformation doesn't query anything per block.
+    """
+    WRITE_VERSION = 1
+    READ_VERSION = 1
+    BLOCK_START = 'start'
+
+    @classmethod
+    def name(cls):
+        return "course_shifts"
+
+    @classmethod
+    def collect(cls, block_structure):
+        block_structure.request_xblock_fields(*set(COURSE_SHIFTED_FIELDS + BLOCK_SHIFTED_FIELDS))
+        # 'start' field is inherited, merged start dates of not shifted blocks use only the values set on them
+        for block_key in block_structure.topological_traversal():
+            block_structure.set_transformer_block_field(
+                block_key, cls, cls.BLOCK_START,
+                get_field_on_block(block_structure.get_xblock(block_key), 'start')
+            )
+
+    def transform_block_filters(self, usage_info, block_structure):
+        days_shift = CourseShiftManager(usage_info.course_key).get_user_days_shift(usage_info.user)
+        if days_shift:
+            delta = timedelta(days=days_shift)
+            for block_key in block_structure.topological_traversal():
+                shifted_fields = get_shifted_fields(block_key.block_type)
+                for field_name in shifted_fields:
+                    base_value = block_structure.get_xblock_field(block_key, field_name)
+                    if base_value:
+                        block_structure.override_xblock_field(block_key, field_name, base_value + delta)
+                self._shift_merged_start_date(block_structure, block_key, 'start' in shifted_fields)
+        return [block_structure.create_universal_filter()]
+
+    @classmethod
+    def _shift_merged_start_date(cls, block_structure, block_key, is_shifted):
+        """
+        Recalculates merged start date of the block the same way as
+        StartDateTransformer collects it, but with shifted start dates.
+        For blocks of shifted categories the shifted 'start' field is used, like
+        in courseware. Parents are traversed before children, so their dates
+        are already shifted
+        """
+        if is_shifted:
+            block_start = block_structure.get_xblock_field(block_key, 'start')
+        else:
+            block_start = block_structure.get_transformer_block_field(block_key, cls, cls.BLOCK_START)
+        parents = block_structure.get_parents(block_key)
+        if not parents:
+            merged_start = block_start or DEFAULT_START_DATE
+        else:
+            merged_parents_start = min(
+                block_structure.get_transformer_block_field(
+                    parent_key, StartDateTransformer, StartDateTransformer.MERGED_START_DATE, DEFAULT_START_DATE
+                )
+                for parent_key in parents
+            )
+            merged_start = max(merged_parents_start, block_start) if block_start else merged_parents_start
+        block_structure.set_transformer_block_field(
+            block_key, StartDateTransformer, StartDateTransformer.MERGED_START_DATE, merged_start
+        )
@@ -4,14 +4,37 @@ URLs for course shifts app
 from django.conf import settings
 from django.conf.urls import patterns, url
 
-from .api import CourseShiftSettingsView, CourseShiftListView, CourseShiftDetailView, CourseShiftUserView
+from .api import (
+    CourseShiftSettingsView,
+    CourseShiftListView,
+    CourseShiftDetailView,
+    CourseShiftUserView,
+    CourseShiftBulkUserView,
+    CourseShiftUserUploadView,
+    CourseShiftRosterExportView,
+    CourseShiftSummaryView,
+    CourseShiftUsersBatchView,
+    CourseShiftUserDeadlinesView,
+)
 
 urlpatterns = patterns(
     'course_shifts',
     url(r'^detail/{}/$'.format(settings.COURSE_ID_PATTERN), CourseShiftDetailView.as_view(),
         name='detail'),
+    url(r'^membership/export/{}/$'.format(settings.COURSE_ID_PATTERN), CourseShiftRosterExportView.as_view(),
+        name='membership_export'),
+    url(r'^membership/upload/{}/$'.format(settings.COURSE_ID_PATTERN), CourseShiftUserUploadView.as_view(),
+        name='membership_upload'),
+    url(r'^membership/batch/{}/$'.format(settings.COURSE_ID_PATTERN), CourseShiftUsersBatchView.as_view(),
+        name='membership_batch'),
+    url(r'^membership/bulk/{}/$'.format(settings.COURSE_ID_PATTERN), CourseShiftBulkUserView.as_view(),
+        name='membership_bulk'),
     url(r'^membership/{}$'.format(settings.COURSE_ID_PATTERN), CourseShiftUserView.as_view(),
         name='membership'),
+    url(r'^deadlines/{}/$'.format(settings.COURSE_ID_PATTERN), CourseShiftUserDeadlinesView.as_view(),
+        name='deadlines'),
+    url(r'^summary/{}/$'.format(settings.COURSE_ID_PATTERN), CourseShiftSummaryView.as_view(),
+        name='summary'),
     url(r'^settings/{}/$'.format(settings.COURSE_ID_PATTERN), CourseShiftSettingsView.as_view(),
         name='settings'),
     url(r'^{}/$'.format(settings.COURSE_ID_PATTERN), CourseShiftListView.as_view(),
@@ -12,6 +12,11 @@ setup(
     version='0.1',
     packages=['course_shifts'],
     include_package_data=True,
+    entry_points={
+        'openedx.block_structure_transformer': [
+            'course_shifts = course_shifts.transformers:CourseShiftTransformer',
+        ],
+    },
     description='Course shifts extension for openedx',
     long_description=README,
     url='https://github.com/miptliot/course_shifts',